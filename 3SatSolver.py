@@ -1,20 +1,26 @@
 import random
 import string
+from watched import WatchedClauses
 
 class Sentence:
-    representation = []
     truth_dictionary = {}
+    engine = None
+    num_letters = 26
 
     #function to generate a single random letter
     #@return the random generated letter
     def get_random_letter(self):
-        alphabet = string.ascii_uppercase
-        letter = random.choice(alphabet)
+        #capital letters, going on to AA, AB, ... when there are more than 26 of them
+        letter = variable_name(random.randrange(self.num_letters))
         return letter
 
     #@param num_clauses is the total number of clauses that will be in the sentence, the number of literals per clause is arbitarary
-    def __init__(self, num_clauses):
-       #   init empty list of list of tuples
+    #@param num_letters is how many different letters the sentence may use
+    def __init__(self, num_clauses, num_letters=26):
+        self.num_letters = num_letters
+        #the clauses are stored as integers in the engine's clause arena, not as lists of strings
+        self.engine = WatchedClauses()
+        self.truth_dictionary = {}
         for i in range(num_clauses):
             clause_size = random.randint(1, 3)
             clause = []
@@ -26,7 +32,25 @@ class Sentence:
               if negate == 1:
                   letter = "~" + letter
               clause.append(letter)
-            self.representation.append(clause)
+            self.engine.add_clause(clause)
+
+    #the sentence as a list of lists of letters, decoded from the engine every time it's asked for
+    #NB: duplicate letters in a clause are dropped, and clauses with a letter and its negation are left out since they're always true.
+    @property
+    def representation(self):
+        return self.engine.representation()
+
+    #setting the representation replaces the sentence, as assigning the list of lists always has
+    #@param representation a list of lists of strings consisting of uppercase letters, negated or not.
+    @representation.setter
+    def representation(self, representation):
+        self.engine = WatchedClauses(representation)
+        #reset the dictionary
+        self.truth_dictionary = {}
+        for clause in representation:
+            for letter in clause:
+                #use get_variable in case the letter is negated, so we avoid the ~
+                self.truth_dictionary[get_variable(letter)] = None
 
     #function to print a CNF expression
     #@param sentence
@@ -34,7 +58,9 @@ class Sentence:
     def print(self):
         print_string = ""
         clause_index = 0
-        for clause in self.representation:
+        #representation decodes the whole engine, so only ask for it once
+        representation = self.representation
+        for clause in representation:
             print_string += "("
             letter_index = 0
             for letter in clause:
@@ -43,7 +69,7 @@ class Sentence:
                     print_string += " | "
                 letter_index += 1
             print_string += ")"
-            if clause_index < len(self.representation) - 1:
+            if clause_index < len(representation) - 1:
                 print_string += " & "
             clause_index += 1
         print(print_string)
@@ -53,7 +79,7 @@ class Sentence:
     def populate_true(self):
          for clause in self.representation:
             for letter in clause:
-                self.truth_dictionary[letter[-1]] = True
+                self.truth_dictionary[get_variable(letter)] = True
 
     #changes the truth value of a letter tuple to a given value
     #@param letter a tuple consisting of a letter and its truth value
@@ -66,11 +92,12 @@ class Sentence:
     #NB: an empty clause means there is a contradiction!
     #@return whether an empty clause is in the sentence
     def contains_empty_clause(self):
-        contains_empty = False
-        for clause in self.representation:
-            if len(clause) == 0:
-                contains_empty = True
-        return contains_empty
+        return 0 in self.engine.arena.sizes
+
+    #gives the watched literal engine that stores the sentence
+    #@return the sentence's WatchedClauses
+    def watched(self):
+        return self.engine
 
     def is_consistent(self):
         consistent = True
@@ -90,11 +117,11 @@ class Sentence:
 def evaluate_clause(clause, truth_dictionary):
     truth_value = False
     for letter in clause:
-        if truth_dictionary[letter[-1]] == True:
+        if truth_dictionary[get_variable(letter)] == True:
             if not is_negated(letter):
                 truth_value = True
                 break
-        elif truth_dictionary[letter[-1]] == False:
+        elif truth_dictionary[get_variable(letter)] == False:
             if is_negated(letter):
                 truth_value = True
                 break
@@ -110,12 +137,40 @@ def evaluate_Expression(sentence):
             break
     return truth_value
 
+#evaluates many assignments at once, in one vectorized pass over the clauses instead of one dictionary at a time
+#NB: this needs numpy, so batch is only imported when it's used
+#@param truth_dictionaries a list of dictionaries like truth_dictionary, where missing or None letters count as false
+#@return how many clauses each assignment satisfies, and a matrix of which clauses each one satisfies
+def evaluate_batch(sentence, truth_dictionaries):
+    import batch
+    evaluator = batch.BatchEvaluator(sentence.watched())
+    return evaluator.evaluate(evaluator.matrix(truth_dictionaries))
+
 #says whether or not a letter is negated
 #@param a string with the letter
 #@return whether the letter is negated
 def is_negated(letter):
     return letter[0] == "~"
 
+#gives the letter of a literal without its negation
+#@param letter a string with the letter, negated or not
+#@return the letter's variable (e.g. A for ~A)
+def get_variable(letter):
+    if is_negated(letter):
+        return letter[1:]
+    return letter
+
+#gives the name of the letter at an index: A to Z, then AA, AB, ... like spreadsheet columns
+#@param index a number from 0 up
+#@return the name of the letter
+def variable_name(index):
+    name = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = string.ascii_uppercase[remainder] + name
+    return name
+
 #gets a list of all clauses with one element
 #@param sentence a CNF sentence stored as list of lists
 #@return a list of clauses with one element
@@ -134,96 +189,57 @@ def get_unit_clauses(sentence):
 #@param sentence a sentence in CNF form
 #@return the literals of a sentence (e.g. A, ~B, C)
 def get_literals(sentence):
-    literals = []
+    #a dictionary drops repeats in one step each, where checking the list was a scan of everything so far
+    literals = {}
     for clause in sentence.representation:
         for literal in clause:
-            if not (literal in literals):
-                literals.append(literal)
-    return literals
+            literals[literal] = None
+    return list(literals)
 
-#finds all literals that only show up in one form 
+#finds all unassigned literals that only show up in one form in the clauses that aren't satisfied yet
 #i.e. they only show up with negations or are never negated
 #@param sentence a sentence in CNF form
 #@return a list of all the pure literals
 def get_pure_literals(sentence):
-    pure_literals = []
-    literals = get_literals(sentence)
-    for literal in literals:
-        is_pure = True
-        for clause in sentence.representation:
-            if (complement(literal) in clause):
-                is_pure = False
-        if is_pure:
-            if not (literal in pure_literals):
-                 pure_literals.append(literal)
-    return pure_literals
+    engine = sentence.watched()
+    return [engine.decode(lit) for lit in engine.pure_literals()]
         
 
-#
-def unit_propagate(sentence, unit_clauses):
-    #remove all instances of letter from sentence
-
-    for unit in unit_clauses:
-        #get_unit_clauses is actually a list of lists, so we need to access it like this
-        print("this is the length of unit clauses: " + str(len(unit_clauses)))
-        letter = unit[0]
-        print("each letter: " + str(letter))
-        print(unit_clauses)
-        if (not is_negated(letter)):
-            sentence.truth_dictionary[letter[-1]] = True
-        else:
-            sentence.truth_dictionary[letter[-1]] = False
-        for clause in sentence.representation:
-            #remove any clauses that are satisfied
-            if (evaluate_clause(clause, sentence.truth_dictionary) == True):
-                sentence.representation.remove(clause)
-            #remove the complement of the unit literal
-            if (complement(letter) in clause):
-                #two unit clauses conflict! unsatisfiable no matter what
-                if len(clause) == 1:
-                    print("the sentence is unsatisfiable")
-                    quit()
-                clause.remove(complement(letter))
-    return sentence
-
-    
-    #return modified sentence
+#propagates every assignment made since the last call through the watched literals.
+#unit clauses are assigned by the engine when it's built, and only clauses watching
+#a literal that just became false get looked at.
+#the new assignments go in the sentence's truth dictionary.
+#@param sentence a sentence in CNF form
+#@return returns True if the propagation was successful, False if a contradiction was created.
+def unit_propagate(sentence):
+    engine = sentence.watched()
+    conflict = engine.propagate()
+    sentence.truth_dictionary.update(engine.assignment())
+    return conflict is None
 
 
+#@return returns False if propagating the pure literals created a contradiction, as for unit_propagate
 def pure_literal_assign(sentence):
-    pure_literals = get_pure_literals(sentence)
-    for literal in pure_literals:
-        if (is_negated(literal)):
-            #set the literal to false if it's always negated
-            sentence.truth_dictionary[literal[-1]] = False
-        else:
-            #set it to true if it's never negated
-            sentence.truth_dictionary[literal[-1]] = True
-        #remove all the clauses we satisfied by this assignment
-        for clause in sentence.representation:
-            if (evaluate_clause(clause, sentence.truth_dictionary) == True):
-                print("remove pure literal: " + str(clause))
-                sentence.representation.remove(clause)
-    return sentence
+    engine = sentence.watched()
+    for lit in engine.pure_literals():
+        #pure literals never share a clause with their complement, so each one can be set true
+        engine.assign(lit)
+    #propagating satisfies every clause the pure literals are in
+    return unit_propagate(sentence)
 
 
 def DPLL(sentence):
-    #im a little confused about the consistent function - sam
-    if sentence.is_consistent():
-        return True
-    #since we remove all satisfied clauses, we can just check if 
-    # the sentence is empty
-    if (len(sentence) == 0):
-        return True    
+    engine = sentence.watched()
     #if we have made a clause empty, there's a contradiction (not satisfiable)
-    if sentence.contains_empty_clause(): 
+    if not engine.ok:
         return False
 
-    #while there are unit clauses, propagate them
-    unit_clauses = get_unit_clauses(sentence)
-    while(len(unit_clauses) != 0):
-        unit_propagate(sentence, unit_clauses)
-        unit_clauses = get_unit_clauses(sentence)
+    #propagate the unit clauses. if two of them conflict, it's unsatisfiable no matter what
+    if not unit_propagate(sentence):
+        return False
+    #the clauses are never removed, so we ask the engine if they are all satisfied
+    if engine.all_satisfied():
+        return True
     
     #assign pure literals true
     #choose a literal and recursively call with its value assigned true then false
@@ -239,7 +255,7 @@ def complement(letter):
     letter = str(letter)
     #if there's a ~ in the letter, just give the letter
     if (is_negated(letter)):
-        return letter[1]
+        return letter[1:]
     #if the letter is not negated, return its negation
     else:
         return "~" + letter
@@ -252,12 +268,16 @@ def main():
 
     unit_clauses = get_unit_clauses(sentence)
     print(unit_clauses)
-    sentence = unit_propagate(sentence, unit_clauses)
+    if not unit_propagate(sentence):
+        print("the sentence is unsatisfiable")
+        return
     print(sentence.truth_dictionary)
     sentence.print()
 
     print("get_pure_literals: " + str(get_pure_literals(sentence)))
-    sentence = pure_literal_assign(sentence)
+    if not pure_literal_assign(sentence):
+        print("the sentence is unsatisfiable")
+        return
     sentence.print()
 
     #print("")
@@ -1,24 +1,47 @@
 import random
 import string
+import allsat
 import copy
+import count
+import time
+import benchmark
+import cube
+import dimacs
+import localsearch
+import preprocess
+from watched import WatchedClauses
+from cdcl import CDCLSolver
+from heuristics import make_heuristic
+from result import Result, SAT, UNSAT, UNKNOWN
+from stats import Statistics
 
 class Sentence:
-    representation = []
     truth_dictionary = {}
-    has_backtracked = False
+    engine = None
+    synced = 0
+    num_letters = 26
+    order = None
+    preprocessor = None
+    #the search counters and any instrumentation, see stats.py. set it to your own Statistics before solving
+    #to turn on timing, progress callbacks, profiling or tracing
+    stats = None
 
     #function to generate a single random letter
     #@return the random generated letter
     def get_random_letter(self):
-        #arbitrarily, we use only capital letters. adding lowercase would be a simple add to alphabet.
-        alphabet = string.ascii_uppercase
-        letter = random.choice(alphabet)
+        #arbitrarily, we use capital letters, going on to AA, AB, ... when there are more than 26 of them.
+        letter = variable_name(random.randrange(self.num_letters))
         return letter
     
     #our class constructor
     #@param num_clauses is the total number of clauses that will be in the sentence, the number of literals per clause is arbitrary
-    def __init__(self, num_clauses):
-       #   init empty list of list of tuples
+    #@param num_letters is how many different letters the sentence may use
+    def __init__(self, num_clauses, num_letters=26):
+        self.num_letters = num_letters
+        #the clauses are stored as integers in the engine's clause arena, not as lists of strings
+        self.engine = WatchedClauses()
+        self.truth_dictionary = {}
+        self.synced = 0
         for i in range(num_clauses):
             #since it's 3SAT, we have max size of 3. 
             clause_size = random.randint(1, 3)
@@ -32,21 +55,50 @@ class Sentence:
               if negate == 1:
                   letter = "~" + letter
               clause.append(letter)
-            self.representation.append(clause)
+            self.engine.add_clause(clause)
+
+    #the sentence as a list of lists of letters. it's decoded from the engine every time it's asked for,
+    #so changing the lists it gives doesn't change the sentence.
+    #NB: duplicate letters in a clause are dropped, and clauses with a letter and its negation are left out since they're always true.
+    @property
+    def representation(self):
+        return self.engine.representation()
+
+    @representation.setter
+    def representation(self, representation):
+        self.manually_set(representation)
     
     #a function to allow the sentence to be manually set. does not require the input to be the same size as the sentence's initial size.
-    #@param representation a list of lists of strings consisting of a single uppercase letter, negated or not.
+    #@param representation a list of lists of strings consisting of uppercase letters, negated or not.
     #NB: we assume the input is given in the proper form!
     def manually_set(self, representation):
-        self.representation = representation
+        self.engine = WatchedClauses(representation)
         #reset the dictionary
         self.truth_dictionary = {}
+        self.synced = 0
+        self.preprocessor = None
         for clause in representation:
             for letter in clause:
-                #use the [-1] notation in case the letter is negated, so we avoid the ~
-                if not (letter[-1] in self.truth_dictionary):
-                    self.truth_dictionary[letter[-1]] = None
+                #use get_variable in case the letter is negated, so we avoid the ~
+                if not (get_variable(letter) in self.truth_dictionary):
+                    self.truth_dictionary[get_variable(letter)] = None
+
+
+    #loads the sentence from a DIMACS CNF file, or a gzip'd one ending in .gz, replacing whatever it held.
+    #letters saved by write_dimacs keep their names, the others are named by their DIMACS number.
+    #@param source a path or a binary file object
+    def load_dimacs(self, source):
+        self.engine = dimacs.read_dimacs(source)
+        self.truth_dictionary = {}
+        self.synced = 0
+        self.preprocessor = None
+        for var in range(self.engine.num_variables):
+            self.truth_dictionary[self.engine.name(var)] = None
 
+    #writes the sentence as DIMACS CNF, the file version of print
+    #@param target a path (gzip'd if it ends in .gz) or a binary file object
+    def write_dimacs(self, target):
+        dimacs.write_dimacs(self.engine, target)
 
     #function to print a CNF expression
     #@param sentence
@@ -54,7 +106,9 @@ class Sentence:
     def print(self):
         print_string = ""
         clause_index = 0
-        for clause in self.representation:
+        #representation decodes the whole engine, so only ask for it once
+        representation = self.representation
+        for clause in representation:
             print_string += "("
             letter_index = 0
             for letter in clause:
@@ -63,7 +117,7 @@ class Sentence:
                     print_string += " | "
                 letter_index += 1
             print_string += ")"
-            if clause_index < len(self.representation) - 1:
+            if clause_index < len(representation) - 1:
                 print_string += " & "
             clause_index += 1
         print(print_string)
@@ -73,20 +127,67 @@ class Sentence:
     #NB: an empty clause means there is a contradiction!
     #@return whether an empty clause is in the sentence
     def contains_empty_clause(self):
-        contains_empty = False
-        for clause in self.representation:
-            if len(clause) == 0:
-                contains_empty = True
-        return contains_empty
+        return 0 in self.engine.arena.sizes
     
-    #creates a copy of the sentence. necessary for backtracking.
+    #creates a copy of the sentence. DPLL backtracks in place, so this is only needed to keep an untouched sentence around.
     #@return returns a deep copy of the sentence and its instance variables.
     def copy(self):
         the_copy = copy.deepcopy(self)
-        the_copy.representation = copy.deepcopy(self.representation)
         the_copy.truth_dictionary = copy.deepcopy(self.truth_dictionary)
-        the_copy.has_backtracked = copy.deepcopy(self.has_backtracked)
         return the_copy
+
+    #simplifies the sentence in place before solving it: it propagates unit clauses, removes subsumed clauses,
+    #strengthens clauses by self-subsuming resolution, and eliminates letters whose resolvents are no more than their clauses.
+    #the eliminated letters get their values back from restore_eliminated once the rest are satisfied.
+    #@return the reduction statistics, e.g. how many clauses and letters are left
+    def preprocess(self):
+        self.engine, self.preprocessor = preprocess.preprocess(self.engine)
+        self.truth_dictionary = dict.fromkeys(self.truth_dictionary)
+        self.synced = 0
+        return self.preprocessor.statistics
+
+    #fills in the letters preprocess eliminated (and any left unassigned) so the truth dictionary satisfies the
+    #original sentence, not just the simplified one. does nothing if the sentence wasn't preprocessed.
+    def restore_eliminated(self):
+        if self.preprocessor is None:
+            return
+        assigned = {}
+        for letter in self.truth_dictionary:
+            if self.truth_dictionary[letter] != None:
+                assigned[letter] = self.truth_dictionary[letter]
+        self.truth_dictionary.update(self.preprocessor.extend(assigned))
+
+    #gives the watched literal engine that stores the sentence
+    #@return the sentence's WatchedClauses
+    def watched(self):
+        return self.engine
+
+    #copies any assignments the engine made since the last call into the truth dictionary
+    def sync_truth_dictionary(self):
+        trail = self.engine.trail
+        for lit in trail[self.synced:]:
+            self.truth_dictionary[self.engine.name(lit >> 1)] = not lit & 1
+        self.synced = len(trail)
+
+    #assigns a letter in place as a new decision, so it can be undone later with backtrack
+    #@param letter the letter to make true, negated or not
+    def decide(self, letter):
+        engine = self.watched()
+        engine.new_decision_level()
+        engine.assign(engine.encode(letter))
+
+    #undoes every assignment made after the given decision level, in place.
+    #this only touches the letters that were assigned, so nothing needs to be copied to branch.
+    #@param level the decision level to go back to
+    def backtrack(self, level):
+        engine = self.watched()
+        if engine.decision_level() <= level:
+            return
+        trail = engine.trail
+        for position in range(engine.trail_lim[level], self.synced):
+            self.truth_dictionary[engine.name(trail[position] >> 1)] = None
+        engine.cancel_until(level)
+        self.synced = min(self.synced, len(trail))
     
     #gets a list of all clauses with one element
     #@param sentence a CNF sentence stored as list of lists
@@ -105,29 +206,19 @@ class Sentence:
     #like this to catch negated literals
     #@return the literals of a sentence (e.g. A, ~B, C)
     def get_literals(self):
-        literals = []
+        #a dictionary drops repeats in one step each, where checking the list was a scan of everything so far
+        literals = {}
         for clause in self.representation:
             for literal in clause:
-                if not (literal in literals):
-                    literals.append(literal)
-        return literals
+                literals[literal] = None
+        return list(literals)
     
-    #finds all literals that only show up in one form 
+    #finds all unassigned literals that only show up in one form in the clauses that aren't satisfied yet
     #i.e. they only show up with negations or are never negated
-    #@param sentence a sentence in CNF form
     #@return a list of all the pure literals
     def get_pure_literals(self):
-        pure_literals = []
-        literals = self.get_literals()
-        for literal in literals:
-            is_pure = True
-            for clause in self.representation:
-                if (complement(literal) in clause):
-                    is_pure = False
-            if is_pure:
-                if not (literal in pure_literals):
-                    pure_literals.append(literal)
-        return pure_literals
+        engine = self.watched()
+        return [engine.decode(lit) for lit in engine.pure_literals()]
     
     #get the list of variables that have no truth value assigned
     #@return a list of unnasigned literals
@@ -141,6 +232,18 @@ class Sentence:
 
 
 
+#makes a random sentence that's reproducible and as hard as random sentences get, unlike Sentence(num_clauses),
+#which picks 1 to 3 letters per clause from the unseeded random module
+#@param num_letters how many letters the sentence uses
+#@param ratio how many clauses there are per letter, around 4.26 for 3 letters per clause is the hardest
+#@param k how many different letters are in every clause
+#@param seed the same seed always gives the same sentence
+#@return the sentence
+def random_sentence(num_letters, ratio=4.26, k=3, seed=None):
+    sentence = Sentence(0, num_letters)
+    sentence.manually_set(benchmark.random_ksat(num_letters, ratio, k, seed, variable_name))
+    return sentence
+
 #evaluates an individual clause for its truth value
 #@param clause a list of letters where the first is the letter
 #@param truth_dictionary an assignment of truth values to be used to evaluate the clause
@@ -149,14 +252,14 @@ def evaluate_clause(clause, truth_dictionary):
     truth_value = False
     for letter in clause:
         if len(clause) != 0:
-            #use [-1] notation in case a letter is negated
-            if truth_dictionary[letter[-1]] == True:
+            #use get_variable in case a letter is negated
+            if truth_dictionary[get_variable(letter)] == True:
                 if not is_negated(letter):
                     truth_value = True
                     #stop evaluating when a single literal is satisfied in the clause, because it's all ORs
                     break
             #note: else wouldn't work here, because the dictionary has None values initially
-            elif truth_dictionary[letter[-1]] == False:
+            elif truth_dictionary[get_variable(letter)] == False:
                 if is_negated(letter):
                     truth_value = True
                     break
@@ -167,156 +270,323 @@ def evaluate_clause(clause, truth_dictionary):
 #@return whether the letter is negated
 def is_negated(letter):
     return letter[0] == "~"
+
+#gives the letter of a literal without its negation
+#@param letter a string with the letter, negated or not
+#@return the letter's variable (e.g. A for ~A)
+def get_variable(letter):
+    if is_negated(letter):
+        return letter[1:]
+    return letter
+
+#gives the name of the letter at an index: A to Z, then AA, AB, ... like spreadsheet columns
+#@param index a number from 0 up
+#@return the name of the letter
+def variable_name(index):
+    name = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = string.ascii_uppercase[remainder] + name
+    return name
         
 
 #performs unit propagation, i.e.
-#it takes all clauses with one element, assigns them the proper value,
-#and them removes all clauses that it satisfies and removes the element's complement from the others
+#it takes every assignment made since the last propagation and follows the watched literals,
+#so only clauses watching a literal that just became false are looked at.
+#the clauses themselves are never removed or shortened, the engine just skips satisfied ones.
 #@param sentence a CNF sentence
-#@param unit_clauses a list of the sentence's unit clauses
 #@return returns True if the propagation was successful, False if a contradiction was created.
 def unit_propagate(sentence):
-    unit_clauses = sentence.get_unit_clauses()
-    for unit in unit_clauses:
-        #get_unit_clauses is actually a list of lists, so we need to access it like this
-        letter = unit[0]
-        if (not is_negated(letter)):
-            #use [-1] notation in case a letter is negated
-            sentence.truth_dictionary[letter[-1]] = True
-        else:
-            sentence.truth_dictionary[letter[-1]] = False
-        for clause in sentence.representation:
-            #remove any clauses that are satisfied
-            remove_satisfied(sentence)
-            #remove the complement of the unit literal
-            if (complement(letter) in clause):
-                #two unit clauses conflict! unsatisfiable in its current form.
-                if len(clause) == 1:
-                    return False
-                else:
-                    clause.remove(complement(letter))
-    return True
+    engine = sentence.watched()
+    stats = sentence.stats
+    if stats is not None and stats.timing:
+        started = time.perf_counter()
+    assigned = len(engine.trail)
+    conflict = engine.propagate()
+    sentence.sync_truth_dictionary()
+    if stats is not None:
+        stats.propagations += len(engine.trail) - assigned
+        if stats.timing:
+            stats.add_time("propagate", time.perf_counter() - started)
+    #let the branching heuristic know which letters were in the conflict
+    if conflict is not None and sentence.order is not None:
+        sentence.order.conflict(lit >> 1 for lit in engine.arena.literals(conflict))
+    return conflict is None
 
 #performs pure literal assignment
 #@param sentence a CNF sentence
-#note: no return is necessary, since parameters are all passed by reference.
-def pure_literal_assign(sentence):
-    pure_literals = sentence.get_pure_literals()
+#note: the assignment is queued on the engine, so unit_propagate needs to run afterwards.
+#@param proof a proof.DratWriter to log the assignment to, as a lemma that the decisions so far imply it
+#@return whether a pure literal was assigned
+def pure_literal_assign(sentence, proof=None):
+    engine = sentence.watched()
+    stats = sentence.stats
+    if stats is not None and stats.timing:
+        started = time.perf_counter()
+    pure_literals = engine.pure_literals()
+    if stats is not None and stats.timing:
+        stats.add_time("pure literals", time.perf_counter() - started)
     if (len(pure_literals) != 0):
         #only assign one pure literal at a time to avoid unnecessary assignment
-        literal = pure_literals[0]
-        if (is_negated(literal)):
-            #use [-1] notation in case a letter is negated
-            sentence.truth_dictionary[literal[-1]] = False
-        else:
-            sentence.truth_dictionary[literal[-1]] = True
-        remove_satisfied(sentence)
-    return sentence
+        if proof is not None:
+            proof.add_implied(engine, pure_literals[:1])
+        engine.assign(pure_literals[0])
+        return True
+    return False
     
 
-#removes any satisfied clauses from the sentence
+#the main algorithm, takes a sentence and figures out if its satisfiable
+#it used to call itself once per decision, which ran into python's recursion limit on big sentences, so now the
+#letter still to try at each decision is kept in a list instead, and it can go as deep as there are letters.
+#it doesn't print anything or quit: it returns a Result (see result.py), which report prints.
+#the counts of decisions, propagations and conflicts are kept in sentence.stats, and a
+#Statistics(trace=print_trace) there prints every step (see stats.py)
 #@param sentence a CNF sentence
-#@return whether anything was removed
-def remove_satisfied(sentence):
-    anything_satisfied = False
-    for clause in sentence.representation:
-        if (evaluate_clause(clause, sentence.truth_dictionary) == True):
-            sentence.representation.remove(clause)
-            anything_satisfied = True
-    return anything_satisfied
-
-#removes the complements of a letter. used only for backtracking.
+#@param heuristic how to choose the letter to branch on: "first", "moms", "jw" or "vsids" (see heuristics.py)
+#@param interrupt a function that's asked after every conflict, and every so often between them, whether to give up, for an UNKNOWN result
+#@param proof a proof.DratWriter to log a DRAT proof to, so an UNSAT result can be checked against the
+#sentence's write_dimacs file with checker.py
+#@param budget a budget.Budget limiting the time, conflicts, propagations or memory the search can use. with a
+#CancelToken in it, another thread can stop the search too. the limit that stopped it goes in the statistics as stopped
+#@param cache a cache.ResultCache. a sentence with the same clauses as one solved before, in any order, gets the
+#answer from it straight away, without searching, and new answers are kept in it
+#@return the result, which is true only if the sentence is satisfiable
+def DPLL(sentence, heuristic="first", interrupt=None, proof=None, budget=None, cache=None):
+    #the search only knows the decisions it makes itself, so undo any made before with decide
+    sentence.backtrack(0)
+    key, names, result = cached_result(sentence, cache, proof)
+    if result is not None:
+        return result
+    engine = sentence.watched()
+    sentence.order = make_heuristic(heuristic, engine)
+    if sentence.stats is None:
+        sentence.stats = Statistics()
+    stats = sentence.stats
+    if budget is not None:
+        budget.start(stats, interrupt)
+        interrupt = budget
+    stats.start()
+    try:
+        answer = search(sentence, interrupt, proof)
+    finally:
+        stats.stop()
+    if answer:
+        sentence.restore_eliminated()
+    return cache_result(cache, key, names, Result.from_answer(answer, assigned_letters(sentence), budget_statistics(stats.as_dict(), budget)))
+
+#looks a sentence up in a cache before solving it. the cache is left alone when there's a proof to log, which a cached
+#answer hasn't, and for a preprocessed sentence, whose clauses don't have all of its letters any more.
+#a SAT answer's assignment is copied into the truth dictionary, as solving would have.
 #@param sentence a CNF sentence
-#@param letter a letter whose complement to look for
-def remove_complements(sentence, letter):
-    #because there may be duplicates in a clause, we loop through 3 times to remove all possible complements
-    for i in range(3):
-        for clause in sentence.representation:
-            if (complement(letter) in clause):
-                clause.remove(complement(letter))
-
-#the main recursive algorithm, takes a sentence and figures out if its satisfiable
-#param sentence a CNF sentence
-#the return values are used for backtracking to determine if a path is workable or not
-def DPLL(sentence):
-
-    #since we remove all satisfied clauses, we can just check if 
-    # the sentence is empty
-    if (len(sentence.representation) == 0):
+#@param cache a cache.ResultCache, or None
+#@param proof the proof.DratWriter the search would log to, or None
+#@return the sentence's key in the cache, the names of its letters in the cache's order, and the cached result;
+#the key is None if the cache is left alone, and the result is None if the answer isn't cached
+def cached_result(sentence, cache, proof=None):
+    if cache is None or proof is not None or sentence.preprocessor is not None:
+        return None, None, None
+    key, names, result = cache.lookup(sentence.representation)
+    if result is not None and result.status == SAT:
+        sentence.truth_dictionary.update(result.model)
+    return key, names, result
+
+#keeps the result of solving a sentence in the cache it was looked up in with cached_result
+#@param cache a cache.ResultCache, or None
+#@param key the sentence's key from cached_result
+#@param names the names of its letters from cached_result
+#@param result the result of solving it
+#@return the result
+def cache_result(cache, key, names, result):
+    if key is not None:
+        cache.put(key, names, result)
+    return result
+
+#gives the statistics of a search for its result, with the limit of its budget that stopped it, if one did
+#@param statistics the search's statistics as a dictionary
+#@param budget the search's budget.Budget, or None
+#@return the dictionary of the statistics
+def budget_statistics(statistics, budget):
+    if budget is not None and budget.exhausted is not None:
+        statistics["stopped"] = budget.exhausted
+    return statistics
+
+#the search loop of DPLL
+#@return True or False for whether the sentence is satisfiable, or None if interrupt said to give up
+def search(sentence, interrupt=None, proof=None):
+    engine = sentence.watched()
+    stats = sentence.stats
+    trace = stats.trace
+    #if we have made a clause empty, there's a contradiction (not satisfiable)
+    if not engine.ok:
+        if proof is not None:
+            proof.add(())
+        return False
+    #for each decision, the letter we try after it, or None once both have been tried
+    untried = []
+    while True:
+        #do unit propagation and pure literal assignment as much as we can
+        consistent = unit_propagate(sentence)
+        while consistent and pure_literal_assign(sentence, proof):
+            consistent = unit_propagate(sentence)
+
+        if consistent:
+            #the clauses are never removed, so we ask the engine if they are all satisfied
+            if engine.all_satisfied():
+                return True
+            #every clause that isn't satisfied still has an unassigned letter, so there is always one to pick
+            letter = engine.decode(sentence.order.pick())
+            untried.append(complement(letter))
+        else:
+            stats.conflicts += 1
+            #log that these decisions can't all be true, so the proof builds up to the empty clause
+            if proof is not None:
+                proof.add_implied(engine)
+            if trace is not None:
+                trace("conflict", engine.decision_level())
+            if stats.progress is not None and stats.conflicts >= stats.next_report:
+                stats.report()
+            if interrupt is not None and interrupt():
+                return None
+            #backtrack to the latest decision whose other value hasn't been tried yet.
+            #if there's none left, every path has been attempted, so it's unsatisfiable.
+            while len(untried) > 0 and untried[-1] == None:
+                untried.pop()
+                #both values of that decision failed, so the ones before it can't all be true
+                if proof is not None:
+                    proof.add_implied(engine, levels=len(untried))
+            if len(untried) == 0:
+                return False
+            letter = untried[-1]
+            untried[-1] = None
+            sentence.backtrack(len(untried) - 1)
+        stats.decisions += 1
+        #a long way between conflicts can run well past a time limit, so ask every so often here too
+        if interrupt is not None and stats.decisions % CDCLSolver.interrupt_interval == 0 and interrupt():
+            return None
+        if trace is not None:
+            trace("decide", letter, len(untried))
+        sentence.decide(letter)
+
+#gives the letters that have a value, to go in a result
+#@return a dictionary of the assigned letters and their values
+def assigned_letters(sentence):
+    assigned_dictionary = {}
+    for letter in sentence.truth_dictionary:
+        if sentence.truth_dictionary[letter] != None:
+            assigned_dictionary[letter] = sentence.truth_dictionary[letter]
+    return assigned_dictionary
+
+#prints a result the way the solver used to print its answer, including the letters that weren't needed
+#@param sentence the CNF sentence that was solved
+#@param result what DPLL, CDCL, local_search or cube_and_conquer returned
+def report(sentence, result):
+    if result.status == SAT:
         print("we have satisfied the sentence! the assignment is:")
-        assigned_dictionary = {}
+        print(result.model)
         unassigned_dictionary = []
         for letter in sentence.truth_dictionary:
-            if sentence.truth_dictionary[letter] != None:
-                assigned_dictionary[letter] = sentence.truth_dictionary[letter]
-            else:
+            if not (letter in result.model):
                 unassigned_dictionary.append(letter)
-        print(assigned_dictionary)
         print("the letters which have no bearing on the truth value are:")
         print(unassigned_dictionary)
-        quit()
-        return True  
+    elif result.status == UNSAT:
+        print("all paths attempted, unsatisfiable.")
     else:
-        print("the sentence is:")
-        sentence.print()
-    #if we have made a clause empty, there's a contradiction (not satisfiable)
-    if sentence.contains_empty_clause(): 
-        print("the sentence is unsatisfiable")
-        return False
+        print("gave up before finding out whether the sentence is satisfiable.")
+    print(result.statistics)
 
-    #do unit propagation and pure literal assignment as much as we can
-    while(len(sentence.get_unit_clauses()) != 0 or len(sentence.get_pure_literals()) != 0):
-        if unit_propagate(sentence) == False:
-            if not (sentence.has_backtracked):
-                print("Unit propagation causes a conflict in the initial sentence. It is unsatisfiable no matter what.")
-                quit()
-            else:
-                print("Two unit clauses conflict. The current branch is unsatisfiable no matter what.")
-                return False
-        pure_literal_assign(sentence)
-    
-    #now we try backtracking
-    #this is our messiest code, sorry! we think it works though.
-    if(len(sentence.representation) != 0):
-        print("WE ARE BACKTRACKING!!!")
-        sentence.has_backtracked = True
-        print("our sentence:")
-        sentence.print()
-        print("our dictionary:")
-        print(sentence.truth_dictionary)
-        unassigned_variables = sentence.get_unassigned_variables()
-        print("unassigned variables:")
-        print(unassigned_variables)
-        if (len(unassigned_variables) != 0):
-            for letter in unassigned_variables:
-                try_true = None
-                try_false = None
-                print("the letter we are trying: " + letter)
-                sentence_copy_true = sentence.copy()
-                sentence_copy_false = sentence.copy()
-                sentence_copy_true.truth_dictionary[letter] = True
-                did_satisfy_true = remove_satisfied(sentence_copy_true)
-                #if this assignment actually does something, see if it satisfies. 
-                if (did_satisfy_true):
-                    remove_complements(sentence_copy_true, letter)
-                    try_true = DPLL(sentence_copy_true)
-                sentence_copy_false.truth_dictionary[letter] = False
-                print("dictionary for true:")
-                print(sentence_copy_true.truth_dictionary)
-                print("dictionary for false:")
-                print(sentence_copy_false.truth_dictionary)
-                did_satisfy_false = remove_satisfied(sentence_copy_false)
-                if (did_satisfy_false):
-                    remove_complements(sentence_copy_false, "~" + letter)
-                    try_false = DPLL(sentence_copy_false)
-                #if we've satisfied the sentence with a path, stop!
-                if (try_true or try_false) == True:
-                    quit()
-                #if neither trying true or false works from the top of our search tree, it's unsatisfiable.
-                if (try_true or try_false) == False:
-                    print("all paths attempted, unsatisfiable.")
-                    quit()      
-    DPLL(sentence)
+#the conflict driven alternative to DPLL. instead of backtracking one decision at a time,
+#it learns a clause from every conflict and jumps back to where that clause becomes unit.
+#with vsids it gives a value to every letter, so there is no list of letters with no bearing.
+#@param sentence a CNF sentence
+#@param heuristic how to choose the letter to branch on, see heuristics.py
+#@param restarts when to start the search over, keeping what was learned: "none", "luby", "geometric" or "glucose"
+#@param interrupt a function that's asked every so often whether to give up, for an UNKNOWN result
+#@param proof a proof.DratWriter to log every learned clause to, as DPLL does
+#@param budget a budget.Budget limiting the search, as for DPLL
+#@param memory how many megabytes the clauses can take before learned ones are thrown out early (see clausedb.py)
+#@param cache a cache.ResultCache to look the sentence up in and keep the answer in, as for DPLL
+#@return the result, which is true only if the sentence is satisfiable
+def CDCL(sentence, heuristic="vsids", restarts="luby", interrupt=None, proof=None, budget=None, memory=None, cache=None):
+    #the solver starts over from level 0 by itself, so undo any decisions through the sentence first,
+    #or the truth dictionary keeps their values and the model comes out wrong
+    sentence.backtrack(0)
+    key, names, result = cached_result(sentence, cache, proof)
+    if result is not None:
+        return result
+    if sentence.stats is None:
+        sentence.stats = Statistics()
+    if budget is not None:
+        budget.start(sentence.stats, interrupt)
+        interrupt = budget
+    solver = CDCLSolver(sentence.watched(), heuristic, restarts, stats=sentence.stats, memory=memory)
+    solver.interrupt = interrupt
+    solver.proof = proof
+    answer = solver.solve()
+    if answer:
+        sentence.sync_truth_dictionary()
+        sentence.restore_eliminated()
+    return cache_result(cache, key, names, Result.from_answer(answer, assigned_letters(sentence), budget_statistics(solver.statistics(), budget)))
+
+#looks for a satisfying assignment by local search instead: it starts from a random assignment and keeps flipping
+#a letter from a clause that's false, which is much faster than DPLL on big satisfiable sentences.
+#it can't show a sentence is unsatisfiable, but if it gives up, the closest assignment it found is saved
+#as the letters' phases, so a CDCL(sentence) afterwards tries those values first.
+#@param sentence a CNF sentence
+#@param algorithm "probsat" or "walksat"
+#@param max_flips how many letters to flip before starting over from a new random assignment
+#@param max_tries how many times to start over before giving up
+#@return the result: SAT, UNKNOWN if it gave up, or UNSAT only if the sentence already has a contradiction
+def local_search(sentence, algorithm="probsat", max_flips=100000, max_tries=10):
+    search = localsearch.LocalSearch(sentence.watched())
+    if search.solve(algorithm, max_flips, max_tries):
+        sentence.truth_dictionary.update(search.assignment())
+        sentence.restore_eliminated()
+        return Result(SAT, assigned_letters(sentence), search.statistics())
+    #giving up before trying anything doesn't mean it's unsatisfiable, only a contradiction does
+    if not sentence.watched().ok or sentence.contains_empty_clause():
+        return Result(UNSAT, None, search.statistics())
+    search.phases()
+    return Result(UNKNOWN, None, search.statistics())
+
+#splits the sentence into cubes, partial assignments found by branching like DPLL does but only a few letters deep,
+#and solves each cube in its own process. it's satisfiable if any cube is, and unsatisfiable only if all of them are.
+#@param sentence a CNF sentence
+#@param workers how many processes to solve cubes in, one per core by default
+#@param depth how many letters deep to branch, by default enough for about four cubes per worker
+#@return the result, with how many cubes there were and how many were solved in its statistics
+def cube_and_conquer(sentence, workers=None, depth=None):
+    answer = cube.solve(sentence.representation, workers, depth)
+    if answer["satisfiable"]:
+        sentence.truth_dictionary.update(answer["model"])
+        sentence.restore_eliminated()
+    statistics = {"cubes": answer["cubes"], "solved": answer["solved"]}
+    return Result.from_answer(answer["satisfiable"], assigned_letters(sentence), statistics)
+
+#gives every satisfying assignment of the sentence, one at a time from a generator, so there can be millions of them
+#without running out of memory. instead of stopping at the first one, it blocks each one found and solves again.
+#it works on a copy of the clauses, so the sentence itself isn't changed. preprocess changes which assignments
+#satisfy the sentence, so enumerate them before preprocessing.
+#@param sentence a CNF sentence
+#@param letters the letters to give values of, all of them by default. assignments that only differ in other letters count once.
+#@param cubes whether to give each assignment without the letters that have no bearing on it, standing for every way of setting those
+#@return a generator of dictionaries of letters to truth values
+def all_solutions(sentence, letters=None, cubes=False):
+    engine = WatchedClauses(sentence.representation)
+    if letters is None:
+        letters = list(sentence.truth_dictionary)
+    return allsat.models(engine, letters, cubes)
+
+#counts the satisfying assignments of a sentence, over all of its letters
+#@param sentence a Sentence
+#@return returns the number of models as an int
+def count_solutions(sentence):
+    engine = WatchedClauses(sentence.representation)
+    #letters in no clause still double the count
+    for letter in sentence.truth_dictionary:
+        engine.variable(letter)
+    return count.ModelCounter(engine).count()
 
 #gives the complement of a given variable
 #@param letter a string representing a variable
@@ -325,14 +595,14 @@ def complement(letter):
     letter = str(letter)
     #if there's a ~ in the letter, just give the letter
     if (is_negated(letter)):
-        return letter[1]
+        return letter[1:]
     #if the letter is not negated, return its negation
     else:
         return "~" + letter
 
 def main():
     sentence = Sentence(10)
-    DPLL(sentence)  
+    report(sentence, DPLL(sentence))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,106 @@
+"""allsat.py: enumerating every model of a formula.
+
+models() finds a model with CDCL, reports it, and adds a blocking clause
+that rules it out, then asks again on the same store, keeping everything
+learned, until the clauses are unsatisfiable. Everything is streamed from
+a generator, so no more than one model is held at a time.
+
+A model can be projected onto some of the variables: only their values are
+reported and blocked, so each projected model comes out once however many
+ways the other variables can be set.
+
+Blocking is cube style. Before blocking a model, every projected variable
+the clauses don't need is dropped from it: a variable can go if each
+clause it helps satisfy has another true literal still kept, counting the
+blocking clauses so far. What is left is a cube, a partial assignment
+whose every completion is a model (with the non-projected variables as
+they were) that no earlier cube covers, and the blocking clause is its
+negation, so a cube with k don't-cares rules out 2 ** k models at once.
+
+>>> list(models(WatchedClauses([['A', 'B']])))
+[{'A': True, 'B': True}, {'A': False, 'B': True}, {'A': True, 'B': False}]
+>>> list(models(WatchedClauses([['A', 'B']]), cubes=True))
+[{'B': True}, {'A': True, 'B': False}]
+"""
+
+import itertools
+
+from cdcl import CDCLSolver
+from watched import TRUE, WatchedClauses
+
+
+def shrink(engine, occurs, clauses, projected):
+    """Gives the literals of the projected variables that the current
+    assignment needs to satisfy the clauses; the rest are don't-cares."""
+    values = engine.values
+    arena = engine.arena
+    lits = arena.lits
+    counts = {}
+    for index in clauses:
+        start = arena.starts[index]
+        counts[index] = sum(1 for position in range(start, start + arena.sizes[index])
+                            if values[lits[position]] == TRUE)
+    needed = []
+    for var in projected:
+        lit = 2 * var if values[2 * var] == TRUE else 2 * var + 1
+        if all(counts[index] > 1 for index in occurs[lit]):
+            for index in occurs[lit]:
+                counts[index] -= 1
+        else:
+            needed.append(lit)
+    return needed
+
+
+def occurrences(engine, projected):
+    """Gives the indices of a store's clauses, leaving out learned ones, and
+    the indices of those each literal is in, with an entry for every
+    literal of the projected variables."""
+    arena = engine.arena
+    clauses = [index for index in range(len(arena)) if not arena.learnt[index]]
+    occurs = {}
+    for index in clauses:
+        for lit in arena.literals(index):
+            occurs.setdefault(lit, []).append(index)
+    for var in projected:
+        occurs.setdefault(2 * var, [])
+        occurs.setdefault(2 * var + 1, [])
+    return clauses, occurs
+
+
+def models(engine, projection=None, cubes=False, heuristic='vsids'):
+    """Yields every model of a store's clauses as a dictionary of name to
+    value.
+
+    projection is a list of variable names to project onto, every variable
+    by default. With cubes, each model yielded leaves out the variables it
+    doesn't care about and stands for every way of setting them; otherwise
+    each cube is expanded into its models. The store has blocking clauses
+    added to it as it goes.
+    """
+    if projection is None:
+        projected = list(range(engine.num_variables))
+    else:
+        projected = list(dict.fromkeys(engine.variable(name) for name in projection))
+    solver = CDCLSolver(engine, heuristic)
+    compactions = None
+    while solver.solve():
+        if engine.compactions != compactions:
+            # deleting learned clauses renumbered the clauses
+            clauses, occurs = occurrences(engine, projected)
+            compactions = engine.compactions
+        needed = shrink(engine, occurs, clauses, projected)
+        values = {lit >> 1: not lit & 1 for lit in needed}
+        free = [var for var in projected if var not in values]
+        engine.cancel_until(0)
+        index = engine.add_literals([lit ^ 1 for lit in needed])
+        # later cubes have to satisfy the blocking clauses too, so they
+        # never overlap this one
+        clauses.append(index)
+        for lit in needed:
+            occurs[lit ^ 1].append(index)
+        if cubes:
+            yield {engine.name(var): values[var] for var in projected if var in values}
+            continue
+        for completion in itertools.product((True, False), repeat=len(free)):
+            values.update(zip(free, completion))
+            yield {engine.name(var): values[var] for var in projected}
@@ -0,0 +1,121 @@
+"""arena.py: compact integer literals and a flat clause store.
+
+A variable is an integer id counting up from 0. Its positive literal is
+2 * var and its negation is 2 * var + 1, so the complement of a literal is a
+single bit flip and a literal can index a per-literal array directly.
+
+Clauses live back to back in one array of literals, with a second array
+giving where each clause starts and a third giving its size. Compared to a
+list of lists of strings this is a few bytes per literal instead of a
+pointer to a string object, and there is no per-clause object at all.
+A clause can also be written straight onto the end of the literal array
+and then closed, so a reader never needs a list per clause.
+"""
+
+from array import array
+
+
+def make_literal(var, negated=False):
+    """Gives the literal of a variable, negated or not."""
+    return 2 * var + (1 if negated else 0)
+
+
+def literal_var(lit):
+    """Gives the variable of a literal."""
+    return lit >> 1
+
+
+def is_negative(lit):
+    """Determines whether a literal is a negated variable."""
+    return lit & 1 == 1
+
+
+def complement(lit):
+    """Gives the opposite of a literal."""
+    return lit ^ 1
+
+
+def from_dimacs(number):
+    """Turns a DIMACS literal (+v or -v, counting from 1) into a literal."""
+    if number < 0:
+        return 2 * (-number - 1) + 1
+    return 2 * (number - 1)
+
+
+def to_dimacs(lit):
+    """Turns a literal into a DIMACS literal (+v or -v, counting from 1)."""
+    number = (lit >> 1) + 1
+    return -number if lit & 1 else number
+
+
+class ClauseArena:
+    """Every clause's literals in one flat array, found by offset and size."""
+
+    def __init__(self):
+        """Initializes an empty arena."""
+        self.lits = array('i')
+        self.starts = array('q')
+        self.sizes = array('i')
+        self.learnt = bytearray()
+
+    def __len__(self):
+        """Gives the number of clauses."""
+        return len(self.starts)
+
+    def __iter__(self):
+        """Iterates over the clauses as arrays of literals."""
+        for index in range(len(self.starts)):
+            yield self.literals(index)
+
+    def add(self, lits, learnt=False):
+        """Appends a clause and gives its index."""
+        start = len(self.lits)
+        self.lits.extend(lits)
+        return self.close(start, learnt)
+
+    def close(self, start, learnt=False):
+        """Makes the literals from start to the end of the literal array a
+        clause, and gives its index."""
+        index = len(self.starts)
+        self.starts.append(start)
+        self.sizes.append(len(self.lits) - start)
+        self.learnt.append(learnt)
+        return index
+
+    def literals(self, index):
+        """Gives a copy of one clause's literals."""
+        start = self.starts[index]
+        return self.lits[start:start + self.sizes[index]]
+
+    def compact(self, keep):
+        """Drops the clauses whose flag in keep is 0, moving the rest down in
+        order, and gives each old index's new one, or -1 if it was dropped.
+
+        The literal array is copied once, so this costs time in the size of
+        the arena.
+        """
+        remap = array('i', [-1]) * len(self.starts)
+        lits = array('i')
+        starts = array('q')
+        sizes = array('i')
+        learnt = bytearray()
+        for index in range(len(self.starts)):
+            if not keep[index]:
+                continue
+            remap[index] = len(starts)
+            start = self.starts[index]
+            size = self.sizes[index]
+            starts.append(len(lits))
+            sizes.append(size)
+            learnt.append(self.learnt[index])
+            lits.extend(self.lits[start:start + size])
+        self.lits = lits
+        self.starts = starts
+        self.sizes = sizes
+        self.learnt = learnt
+        return remap
+
+    def nbytes(self):
+        """Gives the number of bytes the arena's arrays hold."""
+        return len(self.learnt) + sum(len(part) * part.itemsize
+                                      for part in (self.lits, self.starts, self.sizes))
@@ -0,0 +1,102 @@
+"""batch.py: checking many assignments against a formula at once with NumPy.
+
+A BatchEvaluator compiles the clauses of a WatchedClauses store into two
+(clauses x width) arrays, the variable of each literal and whether it is
+negated, padding short clauses with a mask. A batch of assignments is a
+boolean (assignments x variables) matrix, one column per variable in the
+store's order, and is checked in one vectorized pass:
+
+    values[a, c, i] = assignments[a, variables[c, i]] != negated[c, i]
+    satisfied[a, c] = any(values[a, c, :] & present[c, :])
+
+Large batches are split into chunks so the (assignments x clauses x width)
+intermediate stays within a fixed number of elements.
+
+>>> evaluator = BatchEvaluator(WatchedClauses([['A', '~B'], ['B']]))
+>>> evaluator.counts(numpy.array([[True, True], [False, True]]))
+array([2, 1])
+"""
+
+import numpy
+
+from watched import WatchedClauses
+
+
+class BatchEvaluator:
+    """The clauses of a store as index and sign arrays."""
+
+    # the most elements of the intermediate array to make in one go
+    chunk_elements = 1 << 24
+
+    def __init__(self, engine):
+        """Compiles a store's clauses, leaving out learned ones."""
+        arena = engine.arena
+        clauses = [index for index in range(len(arena)) if not arena.learnt[index]]
+        width = max((arena.sizes[index] for index in clauses), default=0)
+        self.names = [engine.name(var) for var in range(engine.num_variables)]
+        self.variables = numpy.zeros((len(clauses), width), dtype=numpy.intp)
+        self.negated = numpy.zeros((len(clauses), width), dtype=bool)
+        self.present = numpy.zeros((len(clauses), width), dtype=bool)
+        for row, index in enumerate(clauses):
+            lits = numpy.frombuffer(arena.literals(index), dtype=numpy.int32)
+            self.variables[row, :len(lits)] = lits >> 1
+            self.negated[row, :len(lits)] = lits & 1
+            self.present[row, :len(lits)] = True
+
+    @property
+    def num_clauses(self):
+        """Gives the number of clauses."""
+        return self.variables.shape[0]
+
+    def matrix(self, dictionaries):
+        """Builds an assignment matrix from dictionaries of name to value,
+        like a Sentence's truth_dictionary; missing or None values are
+        false."""
+        assignments = numpy.zeros((len(dictionaries), len(self.names)), dtype=bool)
+        for row, dictionary in enumerate(dictionaries):
+            assignments[row] = [bool(dictionary.get(name)) for name in self.names]
+        return assignments
+
+    def chunks(self, assignments):
+        """Yields the row ranges to evaluate a batch in."""
+        per_row = max(1, self.variables.size)
+        step = max(1, self.chunk_elements // per_row)
+        for start in range(0, assignments.shape[0], step):
+            yield start, min(start + step, assignments.shape[0])
+
+    def clause_masks(self, assignments):
+        """Gives a boolean (assignments x clauses) matrix of which clauses
+        each assignment satisfies."""
+        assignments = numpy.asarray(assignments, dtype=bool)
+        masks = numpy.empty((assignments.shape[0], self.num_clauses), dtype=bool)
+        for start, end in self.chunks(assignments):
+            values = assignments[start:end, self.variables] != self.negated
+            numpy.any(values & self.present, axis=2, out=masks[start:end])
+        return masks
+
+    def counts(self, assignments):
+        """Gives how many clauses each assignment satisfies."""
+        assignments = numpy.asarray(assignments, dtype=bool)
+        counts = numpy.empty(assignments.shape[0], dtype=numpy.intp)
+        for start, end in self.chunks(assignments):
+            values = assignments[start:end, self.variables] != self.negated
+            counts[start:end] = numpy.any(values & self.present, axis=2).sum(axis=1)
+        return counts
+
+    def evaluate(self, assignments):
+        """Evaluates a batch of assignments.
+
+        Returns how many clauses each assignment satisfies and the
+        (assignments x clauses) matrix of which ones.
+        """
+        masks = self.clause_masks(assignments)
+        return masks.sum(axis=1), masks
+
+    def models(self, assignments):
+        """Gives a boolean vector of which assignments satisfy every clause."""
+        return self.counts(assignments) == self.num_clauses
+
+
+def evaluator(representation):
+    """Builds a BatchEvaluator from a list of clauses of string literals."""
+    return BatchEvaluator(WatchedClauses(representation))
@@ -0,0 +1,260 @@
+"""benchmark.py: reproducible benchmarks of the solver modes.
+
+Formulas come from a seeded random k-SAT generator: n variables and
+round(ratio * n) clauses of exactly k distinct variables each, negated at
+random. At k = 3 the hardest formulas are around ratio 4.26, where about
+half of them are satisfiable, so that's the default.
+
+Every (mode, size, instance) case runs in a fresh worker process, one at a
+time, so each one's peak memory is its own and cases don't slow each other
+down. The results go to a JSON file along with the settings and the
+machine they ran on, and compare() lines up two such files to show what
+got faster or slower between versions.
+
+    python benchmark.py --modes dpll cdcl probsat --sizes 50 100 150 \\
+        --instances 5 --output results.json
+    python benchmark.py --compare old.json results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import dpll
+from budget import Budget
+from cdcl import CDCLSolver
+from localsearch import LocalSearch
+from preprocess import preprocess
+from watched import WatchedClauses
+
+
+def random_ksat(num_variables, ratio=4.26, k=3, seed=None, name=None):
+    """Generates a random k-SAT formula as a list of clauses of string
+    literals.
+
+    Each clause has k different variables, each negated with probability
+    one half. name turns a variable number (from 0) into its name, the
+    DIMACS number by default. The same seed always gives the same formula.
+    """
+    if k > num_variables:
+        raise ValueError('can\'t make clauses of {} different variables out of '
+                         '{}'.format(k, num_variables))
+    if name is None:
+        name = lambda var: str(var + 1)
+    rng = random.Random(seed)
+    clauses = []
+    for _ in range(round(ratio * num_variables)):
+        clause = []
+        for var in rng.sample(range(num_variables), k):
+            clause.append(('~' if rng.randrange(2) else '') + name(var))
+        clauses.append(clause)
+    return clauses
+
+
+def run_dpll(clauses, seconds):
+    """Runs the chronological backtracking DPLL in dpll.py, giving up after
+    the given number of seconds, with stopped in the statistics."""
+    compiled = [tuple(~dpll.Var(letter[1:]) if letter[0] == '~' else dpll.Var(letter)
+                      for letter in clause)
+                for clause in clauses]
+    result = dpll.solve(compiled, 'dpll', budget=Budget(seconds))
+    return result.satisfiable, result.statistics
+
+
+def run_cdcl(clauses, seconds, simplify=False):
+    """Runs CDCL, giving up after the given number of seconds."""
+    engine = WatchedClauses(clauses)
+    statistics = {}
+    if simplify:
+        engine, preprocessor = preprocess(engine)
+        statistics.update(preprocessor.statistics)
+    solver = CDCLSolver(engine)
+    deadline = time.perf_counter() + seconds
+    solver.interrupt = lambda: time.perf_counter() > deadline
+    satisfiable = solver.solve()
+    statistics.update(solver.statistics())
+    return satisfiable, statistics
+
+
+def run_preprocessed_cdcl(clauses, seconds):
+    """Runs CDCL on the preprocessed formula."""
+    return run_cdcl(clauses, seconds, simplify=True)
+
+
+def run_local_search(clauses, seconds, algorithm):
+    """Runs local search, which only ever answers True; None means it gave
+    up."""
+    search = LocalSearch(WatchedClauses(clauses), seed=0)
+    deadline = time.perf_counter() + seconds
+    found = False
+    while not found and time.perf_counter() < deadline:
+        found = search.solve(algorithm, max_flips=10000, max_tries=1)
+    return (True if found else None), search.statistics()
+
+
+MODES = {
+    'dpll': run_dpll,
+    'cdcl': run_cdcl,
+    'cdcl+preprocess': run_preprocessed_cdcl,
+    'walksat': lambda clauses, seconds: run_local_search(clauses, seconds, 'walksat'),
+    'probsat': lambda clauses, seconds: run_local_search(clauses, seconds, 'probsat'),
+}
+
+
+def run_case(mode, num_variables, ratio, k, seed, seconds):
+    """Generates one formula and solves it with one mode, in a worker
+    process of its own.
+
+    Returns the result record: the case, the answer, the wall time, the
+    process's peak resident memory and the solver's counters.
+    """
+    clauses = random_ksat(num_variables, ratio, k, seed)
+    started = time.perf_counter()
+    satisfiable, statistics = MODES[mode](clauses, seconds)
+    elapsed = time.perf_counter() - started
+    record = {
+        'mode': mode,
+        'variables': num_variables,
+        'clauses': len(clauses),
+        'k': k,
+        'ratio': ratio,
+        'seed': seed,
+        'satisfiable': satisfiable,
+        'seconds': elapsed,
+        # kilobytes on Linux
+        'peak_memory_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'decisions': statistics.pop('decisions', None),
+        'conflicts': statistics.pop('conflicts', None),
+    }
+    record['statistics'] = statistics
+    return record
+
+
+def machine():
+    """Describes where the benchmark ran, and which version of the code."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))
+                                ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def run(modes, sizes, instances=3, ratio=4.26, k=3, seed=0, seconds=60.0,
+        output=None, progress=None):
+    """Runs every mode on instances formulas of every size.
+
+    Instance i of every size uses seed + i, so every mode sees the same
+    formulas, and so does every later run with the same settings. Returns
+    the results document, after writing it as JSON to output if one is
+    given. progress, if given, is called with each record as it finishes.
+    """
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError('unknown mode {!r}, expected one of {}'.format(
+                mode, ', '.join(sorted(MODES))))
+    records = []
+    for num_variables in sizes:
+        for instance in range(instances):
+            for mode in modes:
+                # a fresh process for every case, so peak memory is its own
+                with ProcessPoolExecutor(1) as pool:
+                    record = pool.submit(run_case, mode, num_variables, ratio, k,
+                                         seed + instance, seconds).result()
+                records.append(record)
+                if progress is not None:
+                    progress(record)
+    document = {
+        'machine': machine(),
+        'settings': {
+            'modes': list(modes),
+            'sizes': list(sizes),
+            'instances': instances,
+            'ratio': ratio,
+            'k': k,
+            'seed': seed,
+            'seconds': seconds,
+        },
+        'results': records,
+    }
+    if output is not None:
+        with open(output, 'w') as stream:
+            json.dump(document, stream, indent=1)
+    return document
+
+
+def summary(document):
+    """Totals the wall time and counts the answers of each (mode, size)."""
+    totals = {}
+    for record in document['results']:
+        key = (record['mode'], record['variables'])
+        total = totals.setdefault(key, {'seconds': 0.0, 'solved': 0, 'cases': 0})
+        total['seconds'] += record['seconds']
+        total['solved'] += record['satisfiable'] is not None
+        total['cases'] += 1
+    return totals
+
+
+def compare(old, new):
+    """Lines up two results documents, giving for each (mode, size) in both
+    the old and new total seconds and how many times slower the new one is
+    (below 1 is faster)."""
+    old_totals = summary(old)
+    rows = []
+    for key, total in sorted(summary(new).items()):
+        if key in old_totals:
+            before = old_totals[key]['seconds']
+            after = total['seconds']
+            rows.append((key[0], key[1], before, after,
+                         after / before if before else float('inf')))
+    return rows
+
+
+def main(arguments=None):
+    """Runs the benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modes', nargs='+', default=['dpll', 'cdcl', 'probsat'],
+                        choices=sorted(MODES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=[25, 50, 75, 100])
+    parser.add_argument('--instances', type=int, default=3)
+    parser.add_argument('--ratio', type=float, default=4.26)
+    parser.add_argument('-k', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--seconds', type=float, default=60.0,
+                        help='time limit per case, for the modes that can stop')
+    parser.add_argument('--output', default='results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='compare two results files instead of running')
+    options = parser.parse_args(arguments)
+    if options.compare:
+        documents = []
+        for path in options.compare:
+            with open(path) as stream:
+                documents.append(json.load(stream))
+        for mode, size, before, after, ratio in compare(*documents):
+            print('{:<16} {:>6} {:>10.3f}s {:>10.3f}s {:>7.2f}x'.format(
+                mode, size, before, after, ratio))
+        return
+    def progress(record):
+        print('{mode:<16} n={variables:<6} seed={seed:<4} {satisfiable!s:<5} '
+              '{seconds:.3f}s {peak_memory_kb}kB'.format(**record), file=sys.stderr)
+    run(options.modes, options.sizes, options.instances, options.ratio,
+        options.k, options.seed, options.seconds, options.output, progress)
+
+
+if __name__ == '__main__':
+    main()
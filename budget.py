@@ -0,0 +1,143 @@
+"""budget.py: limits on a search, and cancelling it from another thread.
+
+A Budget is an interrupt function for the solvers (see CDCLSolver.interrupt
+and dpll.search): it says to give up once a search has run for too long,
+hit too many conflicts or propagations, or the process uses too much
+memory, or once its CancelToken has been cancelled. The solvers ask every
+conflict (DPLL) or every interrupt_interval conflicts and at every restart
+(CDCL), and both every interrupt_interval decisions as well, so a search
+that goes a long way between conflicts still stops close to its time
+limit. A search that gives up answers UNKNOWN.
+
+Each check compares a counter of the search's Statistics, and the clock,
+with a limit; the memory limit is only read every memory_interval checks.
+start() has to be called with the search's Statistics before it runs, and
+counts from where they are then, so a budget limits one call to solve even
+when the statistics run on across incremental calls.
+
+>>> from benchmark import random_ksat
+>>> from cdcl import CDCLSolver
+>>> from stats import Statistics
+>>> from watched import WatchedClauses
+>>> stats = Statistics()
+>>> budget = Budget(seconds=10, conflicts=100)
+>>> budget.start(stats)
+>>> solver = CDCLSolver(WatchedClauses(random_ksat(200, seed=1)), stats=stats)
+>>> solver.interrupt = budget
+>>> solver.solve(), budget.exhausted
+(None, 'conflicts')
+
+dpll.solve(clauses, budget=budget) starts the budget itself.
+"""
+
+import os
+import resource
+import threading
+import time
+
+# the size of a memory page, for reading /proc/self/statm
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def resident_memory():
+    """Gives the memory the process is using in megabytes: its resident set
+    where /proc has it, else the most it has ever used."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class CancelToken:
+    """A flag any thread can set to stop a search in another."""
+
+    def __init__(self):
+        """Initializes the token, not cancelled."""
+        self.event = threading.Event()
+
+    def cancel(self):
+        """Asks the searches holding the token to stop."""
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        """Determines whether the token has been cancelled."""
+        return self.event.is_set()
+
+    def __call__(self):
+        """Determines whether the token has been cancelled, so a token can be
+        an interrupt function by itself."""
+        return self.event.is_set()
+
+
+class Budget:
+    """Wall clock, conflict, propagation and memory limits on a search."""
+
+    # how many checks go by between reads of the memory in use
+    memory_interval = 16
+
+    def __init__(self, seconds=None, conflicts=None, propagations=None,
+                 memory=None, token=None):
+        """Initializes the budget; a limit of None is no limit.
+
+        memory is in megabytes and counts the whole process, so searches
+        running in threads of one process share it. token is a CancelToken
+        that stops the search when cancelled.
+        """
+        self.seconds = seconds
+        self.conflicts = conflicts
+        self.propagations = propagations
+        self.memory = memory
+        self.token = token
+        self.stats = None
+        self.interrupt = None
+        self.deadline = None
+        self.conflict_limit = None
+        self.propagation_limit = None
+        self.checks = 0
+        # which limit stopped the search, or None
+        self.exhausted = None
+
+    def start(self, stats, interrupt=None):
+        """Starts counting against a search's Statistics.
+
+        interrupt is another interrupt function to ask along with the
+        limits, if the search has one.
+        """
+        self.stats = stats
+        self.interrupt = interrupt
+        self.checks = 0
+        self.exhausted = None
+        if self.seconds is not None:
+            self.deadline = time.perf_counter() + self.seconds
+        if self.conflicts is not None:
+            self.conflict_limit = stats.conflicts + self.conflicts
+        if self.propagations is not None:
+            self.propagation_limit = stats.propagations + self.propagations
+
+    def __call__(self):
+        """Determines whether the search should stop, noting why in
+        exhausted."""
+        self.exhausted = self.check()
+        return self.exhausted is not None
+
+    def check(self):
+        """Gives the name of the limit the search has gone past, or None."""
+        stats = self.stats
+        if self.token is not None and self.token.cancelled:
+            return 'cancelled'
+        if self.conflict_limit is not None and stats.conflicts >= self.conflict_limit:
+            return 'conflicts'
+        if (self.propagation_limit is not None
+                and stats.propagations >= self.propagation_limit):
+            return 'propagations'
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return 'seconds'
+        self.checks += 1
+        if (self.memory is not None and (self.checks - 1) % self.memory_interval == 0
+                and resident_memory() >= self.memory):
+            return 'memory'
+        if self.interrupt is not None and self.interrupt():
+            return 'interrupted'
+        return None
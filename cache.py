@@ -0,0 +1,228 @@
+"""cache.py: remembering the answers to formulas solved before.
+
+A ResultCache keys each formula by a hash of its canonical form, so the
+same formula comes back from the cache however its clauses and literals
+are ordered, and whatever duplicates it has. The canonical form sorts the
+literals of each clause and the clauses, drops repeated literals, repeated
+clauses and tautologies, and numbers the variables 0, 1, ... in order of
+their names. Only SAT and UNSAT answers are kept, with the model of a SAT
+one; a search that gave up tells nothing about the formula.
+
+With rename, the names are left out of the form, and the variables are
+numbered in order of how they occur (see occurrence_order), with names
+only breaking ties. Then a formula with its variables renamed usually has
+the same form too, and the model is given back in the new names. Renaming
+is a best effort: two formulas with the same form are always the same up
+to names, but some renamings, where variables occur alike, still give a
+different form.
+
+The most recently used answers are kept in a dictionary of at most size
+entries, and given a path, in an sqlite database there too, so they last
+across processes. A hit in memory takes a hash of the formula and a
+dictionary lookup. The cache can be shared between threads.
+
+>>> import dpll
+>>> x, y = dpll.Var('x'), dpll.Var('y')
+>>> clauses = [(x, y), (~x, y), (~y, x)]
+>>> cache = ResultCache()
+>>> dpll.solve(clauses, cache=cache).status
+'SAT'
+>>> result = dpll.solve([(y, ~x), (x, ~y), (y, x)], cache=cache)
+>>> result.model, result.statistics
+({'x': True, 'y': True}, {'cached': True})
+>>> cache.statistics()['hits']
+1
+"""
+
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from result import Result, SAT, UNKNOWN
+
+# how a model's values are written, by canonical variable; '-' is no value
+VALUE_CODES = {True: '1', False: '0', None: '-'}
+CODE_VALUES = {'1': True, '0': False}
+
+
+def parse_literal(letter):
+    """Gives the name of a string literal and whether it is negated."""
+    if letter.startswith('~'):
+        return letter[1:], True
+    return letter, False
+
+
+def canonical_form(clauses, rename=False):
+    """Gives the canonical form of a formula, as text, and the names of its
+    variables in canonical order.
+
+    clauses is an iterable of iterables of string literals like 'A' and
+    '~A', as WatchedClauses.representation gives them.
+    """
+    unique = set()
+    for clause in clauses:
+        literals = frozenset(parse_literal(letter) for letter in clause)
+        if not any((name, not negated) in literals for name, negated in literals):
+            unique.add(literals)
+    if rename:
+        names = occurrence_order(unique)
+    else:
+        names = sorted({name for literals in unique for name, _ in literals})
+    numbers = {name: number for number, name in enumerate(names)}
+    form = sorted(sorted(2 * numbers[name] + negated for name, negated in literals)
+                  for literals in unique)
+    lines = ['renamed' if rename else ' '.join(names)]
+    lines.extend(' '.join(map(str, clause)) for clause in form)
+    return '\n'.join(lines), names
+
+
+def occurrence_order(clauses, rounds=3):
+    """Orders the variables of a set of clauses, frozensets of (name,
+    negated) pairs, by how they occur rather than by name.
+
+    Each variable starts with a color numbering how many clauses of each
+    size it is in, with which sign; then each round, its color becomes one
+    for its color and the colors of the clauses it is in, which come from
+    the colors of their literals, until no colors split or rounds run out.
+    Variables left with the same color go in order of their names.
+    """
+    colors = dict.fromkeys((name for literals in clauses for name, _ in literals), 0)
+    for _ in range(rounds + 1):
+        signatures = {name: [] for name in colors}
+        for literals in clauses:
+            clause = tuple(sorted(2 * colors[name] + negated for name, negated in literals))
+            for name, negated in literals:
+                signatures[name].append((negated, clause))
+        for name, signature in signatures.items():
+            signatures[name] = (colors[name], tuple(sorted(signature)))
+        ranks = {signature: rank for rank, signature
+                 in enumerate(sorted(set(signatures.values())))}
+        before = len(set(colors.values()))
+        colors = {name: ranks[signature] for name, signature in signatures.items()}
+        if len(ranks) == before:
+            break
+    return sorted(colors, key=lambda name: (colors[name], name))
+
+
+class ResultCache:
+    """Answers to formulas by their canonical form, in memory and optionally
+    on disk."""
+
+    def __init__(self, path=None, size=10000, rename=False):
+        """Initializes the cache.
+
+        path is an sqlite database file to keep the answers in too, made if
+        it doesn't exist, or None to keep them only in memory. size is how
+        many answers to keep in memory. rename chooses whether formulas
+        that only differ in their variables' names are the same.
+        """
+        self.size = size
+        self.rename = rename
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.database = None
+        if path is not None:
+            self.database = sqlite3.connect(path, check_same_thread=False)
+            self.database.execute('CREATE TABLE IF NOT EXISTS results '
+                                  '(key TEXT PRIMARY KEY, status TEXT, model TEXT)')
+            self.database.commit()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __enter__(self):
+        """Gives the cache itself."""
+        return self
+
+    def __exit__(self, *exception):
+        """Closes the cache."""
+        self.close()
+
+    def key(self, clauses):
+        """Gives the key of a formula, a hash of its canonical form, and the
+        names of its variables in canonical order."""
+        form, names = canonical_form(clauses, self.rename)
+        return hashlib.sha256(form.encode()).hexdigest(), names
+
+    def get(self, key, names):
+        """Gives the cached Result for a key, with its model in the given
+        names, or None if it isn't in the cache."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            elif self.database is not None:
+                row = self.database.execute(
+                    'SELECT status, model FROM results WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    entry = row
+                    self.remember(key, entry)
+                    self.disk_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        status, codes = entry
+        if status != SAT:
+            return Result(status, statistics={'cached': True})
+        model = {name: CODE_VALUES[code] for name, code in zip(names, codes)
+                 if code in CODE_VALUES}
+        return Result(status, model, {'cached': True})
+
+    def put(self, key, names, result):
+        """Caches a Result for a key, with its model in the given names;
+        UNKNOWN results are left out."""
+        if result.status == UNKNOWN:
+            return
+        codes = ''
+        if result.status == SAT:
+            model = result.model or {}
+            codes = ''.join(VALUE_CODES[model.get(name)] for name in names)
+        entry = (result.status, codes)
+        with self.lock:
+            self.remember(key, entry)
+            if self.database is not None:
+                self.database.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                      (key, result.status, codes))
+                self.database.commit()
+            self.stores += 1
+
+    def remember(self, key, entry):
+        """Keeps an entry in memory, forgetting the least recently used one if
+        there are too many; the lock must be held."""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def lookup(self, clauses):
+        """Gives the key of a formula, its variables' names and its cached
+        Result, or None, in one go."""
+        key, names = self.key(clauses)
+        return key, names, self.get(key, names)
+
+    def clear(self):
+        """Forgets every answer, on disk too."""
+        with self.lock:
+            self.entries.clear()
+            if self.database is not None:
+                self.database.execute('DELETE FROM results')
+                self.database.commit()
+
+    def close(self):
+        """Closes the database, if there is one."""
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+    def statistics(self):
+        """Gives the cache counters as a dictionary."""
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'entries': len(self.entries),
+        }
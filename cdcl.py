@@ -0,0 +1,299 @@
+"""cdcl.py: conflict-driven clause learning on top of WatchedClauses.
+
+Where DPLL undoes its last decision when it hits a conflict, CDCL walks the
+implication graph back from the conflicting clause to the first unique
+implication point, learns the clause that cuts the graph there, and jumps
+straight back to the level where that clause becomes unit. A restart
+policy (see restarts.py) decides when to cancel every decision and start
+again, keeping what was learned.
+
+solve() can also take assumptions, literals decided first, one per level,
+before the heuristic gets a say. Since they are decisions, everything
+learned under them follows from the clauses alone and stays valid for the
+next call, which is what makes incremental solving (see incremental.py)
+cheap. When the assumptions can't all hold, the solver works out which of
+them are to blame.
+
+The learned clauses are pruned as the search goes by a ClauseDatabase (see
+clausedb.py), its database; setting that to None keeps every one.
+
+Give the solver a proof.DratWriter as its proof and every clause it learns
+is logged, with the empty clause when it finds the clauses unsatisfiable,
+so checker.py can check the answer.
+"""
+
+import random
+import time
+
+from clausedb import ClauseDatabase
+from heuristics import make_heuristic
+from restarts import make_restart_policy
+from stats import Statistics
+from watched import FALSE, TRUE, WatchedClauses
+
+
+class CDCLSolver:
+    """A CDCL search over a WatchedClauses store."""
+
+    # how many conflicts, or decisions, go by between calls to interrupt
+    interrupt_interval = 64
+
+    def __init__(self, engine, heuristic='vsids', restarts='luby',
+                 phase_saving=True, seed=None, stats=None, memory=None):
+        """Initializes the solver on an engine, which it assigns in place.
+
+        heuristic names the decision heuristic (see heuristics.py) and
+        restarts the restart policy (see restarts.py). phase_saving makes
+        the heuristic branch on the polarity a variable last had. A seed
+        randomizes the starting phases and the heuristic's tie breaking,
+        so differently seeded solvers search differently. stats is a
+        Statistics to count into, with any instrumentation it has turned on
+        (see stats.py); by default the solver makes a plain one. memory is
+        the ceiling on the clause store in megabytes, past which learned
+        clauses are deleted early.
+        """
+        self.engine = engine
+        self.order = make_heuristic(heuristic, engine)
+        self.order.phase_saving = phase_saving
+        self.restart_policy = make_restart_policy(restarts)
+        if seed is not None:
+            rng = random.Random(seed)
+            for var in range(engine.num_variables):
+                engine.phases[var] = rng.randrange(2)
+            self.order.randomize(rng)
+        # a function that says when to give up, checked every
+        # interrupt_interval conflicts and decisions and at every restart
+        self.interrupt = None
+        # where to send short learned clauses and get other solvers' from,
+        # see portfolio.ClauseExchange
+        self.exchange = None
+        # a proof.DratWriter to log learned clauses to; clauses imported
+        # from an exchange are logged too, but another solver derived them,
+        # so the proof may not check
+        self.proof = None
+        # the assumptions to blame after solve() with assumptions says False
+        self.failed = []
+        self.stats = Statistics() if stats is None else stats
+        self.database = ClauseDatabase(engine, memory)
+
+    def statistics(self):
+        """Gives the search counters, and the clause database's, as a
+        dictionary."""
+        statistics = self.stats.as_dict()
+        if self.database is not None:
+            statistics.update(self.database.statistics())
+        return statistics
+
+    def lbd(self, lits):
+        """Gives the number of decision levels among a clause's literals."""
+        levels = self.engine.levels
+        return len({levels[lit >> 1] for lit in lits})
+
+    def analyze(self, conflict):
+        """Learns the first-UIP clause of a conflict.
+
+        Returns the learned clause, asserting literal first, and the level
+        to backjump to.
+        """
+        engine = self.engine
+        levels = engine.levels
+        trail = engine.trail
+        level = engine.decision_level()
+        seen = set()
+        learned = [None]
+        counter = 0
+        lit = None
+        index = len(trail) - 1
+        database = self.database
+        if database is not None:
+            database.bump(conflict)
+        clause = engine.arena.literals(conflict)
+        while True:
+            for other in clause:
+                var = other >> 1
+                if other == lit or var in seen or levels[var] == 0:
+                    continue
+                seen.add(var)
+                if levels[var] == level:
+                    counter += 1
+                else:
+                    learned.append(other)
+            # the next literal to resolve on is the latest seen one
+            while trail[index] >> 1 not in seen:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            reason = engine.reasons[lit >> 1]
+            if database is not None:
+                database.bump(reason)
+            clause = engine.arena.literals(reason)
+        learned[0] = lit ^ 1
+        self.order.conflict(seen)
+
+        backjump = 0
+        for position in range(2, len(learned)):
+            if levels[learned[position] >> 1] > levels[learned[1] >> 1]:
+                learned[1], learned[position] = learned[position], learned[1]
+        if len(learned) > 1:
+            backjump = levels[learned[1] >> 1]
+        return learned, backjump
+
+    def analyze_final(self, lit):
+        """Finds the assumptions that together make an assumed literal false.
+
+        Walks the trail back from lit's complement the way analyze does, but
+        all the way down to the decisions, which are all assumptions here.
+        Returns those assumptions with lit itself.
+        """
+        engine = self.engine
+        levels = engine.levels
+        reasons = engine.reasons
+        trail = engine.trail
+        failed = [lit]
+        if levels[lit >> 1] == 0:
+            return failed
+        seen = {lit >> 1}
+        for position in range(len(trail) - 1, engine.trail_lim[0] - 1, -1):
+            var = trail[position] >> 1
+            if var not in seen:
+                continue
+            if reasons[var] == -1:
+                failed.append(trail[position])
+            else:
+                for other in engine.arena.literals(reasons[var]):
+                    if levels[other >> 1] > 0:
+                        seen.add(other >> 1)
+        return failed
+
+    def solve(self, assumptions=()):
+        """Determines if the engine's clauses are satisfiable, with the
+        assumed integer literals true if any are given.
+
+        On success the engine is left holding a satisfying assignment. When
+        the assumptions are to blame for a False answer, failed holds the
+        ones that can't all be true together; it's empty if the clauses are
+        unsatisfiable on their own. Returns None if interrupt stopped the
+        search before an answer.
+        """
+        self.failed = []
+        self.engine.cancel_until(0)
+        self.stats.start()
+        try:
+            return self.search(assumptions)
+        finally:
+            self.stats.stop()
+
+    def search(self, assumptions):
+        """Runs the search loop for solve."""
+        engine = self.engine
+        stats = self.stats
+        timing = stats.timing
+        trace = stats.trace
+        proof = self.proof
+        database = self.database
+        if not engine.ok:
+            if proof is not None:
+                proof.add(())
+            return False
+        while True:
+            if timing:
+                started = time.perf_counter()
+            assigned = len(engine.trail)
+            conflict = engine.propagate()
+            stats.propagations += len(engine.trail) - assigned
+            if timing:
+                stats.add_time('propagate', time.perf_counter() - started)
+            if conflict is not None:
+                stats.conflicts += 1
+                if engine.decision_level() == 0:
+                    engine.ok = False
+                    if proof is not None:
+                        proof.add(())
+                    return False
+                if timing:
+                    started = time.perf_counter()
+                learned, backjump = self.analyze(conflict)
+                lbd = self.lbd(learned)
+                self.restart_policy.conflict(lbd)
+                engine.cancel_until(backjump)
+                index = engine.add_learned(learned)
+                if proof is not None:
+                    proof.add(learned)
+                if database is not None:
+                    if index is not None:
+                        database.learned(index, lbd)
+                    database.decay()
+                    if database.due(stats.conflicts):
+                        database.reduce(stats.conflicts, proof)
+                if timing:
+                    stats.add_time('analyze', time.perf_counter() - started)
+                if trace is not None:
+                    trace('learn', [engine.decode(lit) for lit in learned], backjump)
+                stats.learned += 1
+                if self.exchange is not None:
+                    self.exchange.export(learned)
+                if stats.progress is not None and stats.conflicts >= stats.next_report:
+                    stats.report()
+                if (self.interrupt is not None
+                        and stats.conflicts % self.interrupt_interval == 0
+                        and self.interrupt()):
+                    return None
+            elif self.restart_policy.should_restart():
+                stats.restarts += 1
+                if trace is not None:
+                    trace('restart', stats.conflicts)
+                self.restart_policy.restarted()
+                engine.cancel_until(0)
+                if self.interrupt is not None and self.interrupt():
+                    return None
+                if self.exchange is not None:
+                    for lits in self.exchange.imports():
+                        index = engine.add_literals(lits, learnt=True)
+                        if proof is not None:
+                            proof.add(lits)
+                        if database is not None and index is not None:
+                            database.learned(index, len(lits))
+                    if not engine.ok:
+                        if proof is not None:
+                            proof.add(())
+                        return False
+            elif engine.decision_level() < len(assumptions):
+                lit = assumptions[engine.decision_level()]
+                value = engine.values[lit]
+                if value == TRUE:
+                    # already implied, so its level stays empty
+                    engine.new_decision_level()
+                elif value == FALSE:
+                    self.failed = self.analyze_final(lit)
+                    return False
+                else:
+                    engine.new_decision_level()
+                    engine.assign(lit)
+            else:
+                lit = self.order.pick()
+                if lit is None:
+                    return True
+                stats.decisions += 1
+                if (self.interrupt is not None
+                        and stats.decisions % self.interrupt_interval == 0
+                        and self.interrupt()):
+                    return None
+                if trace is not None:
+                    trace('decide', engine.decode(lit), engine.decision_level() + 1)
+                engine.new_decision_level()
+                engine.assign(lit)
+
+
+def solve(representation, heuristic='vsids', restarts='luby'):
+    """Solves a list of clauses of string literals with CDCL.
+
+    Returns a dictionary from variable names to truth values, or None if
+    the clauses are unsatisfiable.
+    """
+    engine = WatchedClauses(representation)
+    if CDCLSolver(engine, heuristic, restarts).solve():
+        return engine.assignment()
+    return None
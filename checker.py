@@ -0,0 +1,475 @@
+"""checker.py: checking DRAT proofs of unsatisfiability.
+
+A Checker replays a proof (see proof.py) against the formula it refutes.
+Every lemma has to follow from the clauses still active before it: setting
+its literals false and unit propagating has to reach a conflict (RUP), or
+failing that, every resolvent on its first literal has to (RAT). The proof
+is verified once the active clauses propagate to a conflict with nothing
+assumed, which a proof ending in the empty clause always makes happen.
+
+Each check starts from an empty assignment, with the active unit clauses
+and the lemma's negation propagated through two watched literals, so
+deleting a clause (even a unit) never leaves stale assignments behind.
+
+Checking forward checks every lemma in order. Checking backward first runs
+through the proof without checking anything, up to the conflict, and then
+goes back through it undoing each step, checking only the lemmas that the
+conflict, or a lemma already checked, was derived from. Solvers learn many
+clauses they never use, so backward checking usually checks a fraction of
+them.
+
+From the command line, like drat-trim:
+
+    python checker.py formula.cnf proof.drat [--forward]
+"""
+
+import argparse
+import gzip
+import sys
+import time
+from array import array
+
+from arena import ClauseArena, to_dimacs
+from dimacs import read_dimacs
+
+# how much of a proof to read at a time
+BLOCK_SIZE = 1 << 20
+
+# bytes a text proof can have; anything else means it's binary
+TEXT_BYTES = frozenset(range(32, 127)) | frozenset(b'\t\r\n')
+
+
+def read_proof(source, binary=None):
+    """Yields the steps of a DRAT proof as (deleted, literals) pairs, with
+    integer literals.
+
+    source is a path, read through gzip if it ends in '.gz', or a binary
+    file object. binary says which format it's in; by default that's
+    guessed from its first bytes.
+    """
+    if isinstance(source, str):
+        opener = gzip.open if source.endswith('.gz') else open
+        with opener(source, 'rb') as stream:
+            yield from read_proof(stream, binary)
+        return
+    block = source.read(BLOCK_SIZE)
+    if binary is None:
+        # a text step never starts with 'a', and binary steps end in 0
+        binary = block[:1] == b'a' or not TEXT_BYTES.issuperset(block[:64])
+    if binary:
+        steps = binary_steps(source, block)
+    else:
+        steps = text_steps(source, block)
+    yield from steps
+
+
+def binary_steps(stream, block):
+    """Yields the steps of a binary proof, starting from a block already
+    read."""
+    lits = []
+    deleted = None
+    number = 0
+    shift = 0
+    while block:
+        for byte in block:
+            if deleted is None:
+                if byte == 0x61:
+                    deleted = False
+                elif byte == 0x64:
+                    deleted = True
+                else:
+                    raise ValueError('bad binary proof step 0x{:02x}'.format(byte))
+                continue
+            number |= (byte & 127) << shift
+            if byte & 128:
+                shift += 7
+                continue
+            if number == 0:
+                yield deleted, lits
+                lits = []
+                deleted = None
+            else:
+                lits.append(number - 2)
+            number = 0
+            shift = 0
+        block = stream.read(BLOCK_SIZE)
+    if deleted is not None:
+        raise ValueError('binary proof ends in the middle of a step')
+
+
+def text_steps(stream, block):
+    """Yields the steps of a text proof, starting from a block already
+    read."""
+    lits = []
+    deleted = False
+    pending = b''
+    while block:
+        pending += block
+        block = stream.read(BLOCK_SIZE)
+        if block:
+            # keep a line cut off at the end of the block for the next one
+            cut = pending.rfind(b'\n') + 1
+            lines, pending = pending[:cut], pending[cut:]
+        else:
+            lines, pending = pending, b''
+        for line in lines.split(b'\n'):
+            if line.lstrip().startswith(b'c'):
+                continue
+            for token in line.split():
+                if token == b'd':
+                    deleted = True
+                    continue
+                number = int(token)
+                if number == 0:
+                    yield deleted, lits
+                    lits = []
+                    deleted = False
+                elif number < 0:
+                    lits.append(2 * (-number - 1) + 1)
+                else:
+                    lits.append(2 * (number - 1))
+    if lits or deleted:
+        raise ValueError('text proof ends in the middle of a step')
+
+
+class Checker:
+    """Checks DRAT proofs against a formula's clauses."""
+
+    def __init__(self, engine):
+        """Initializes the checker with the clauses of a WatchedClauses
+        store, leaving out learned ones."""
+        self.arena = ClauseArena()
+        self.active = bytearray()
+        self.marked = bytearray()
+        # each clause's first literal, the one RAT resolves on
+        self.pivots = array('i')
+        # the active clauses by their sorted literals, to find deletions
+        self.index = {}
+        self.units = {}
+        # every clause's index by each of its literals, for RAT checks
+        self.occurs = {}
+        self.values = bytearray(2 * engine.num_variables)
+        self.reasons = array('i')
+        self.watches = [[] for _ in range(2 * engine.num_variables)]
+        self.trail = []
+        source = engine.arena
+        for index in range(len(source)):
+            if not source.learnt[index]:
+                self.add(source.literals(index))
+        self.lemmas = 0
+        self.checked = 0
+        self.deletions = 0
+        self.rat = 0
+        # the lemma that failed its check, as DIMACS literals
+        self.failed = None
+
+    def grow(self, lits):
+        """Makes room for the variables of some literals."""
+        top = 2 * (max(lits) // 2 + 1)
+        if top > len(self.values):
+            self.values.extend(bytes(top - len(self.values)))
+            self.watches.extend([] for _ in range(top - len(self.watches)))
+
+    def add(self, lits):
+        """Adds a clause of integer literals as active and gives its index."""
+        lits = list(dict.fromkeys(lits))
+        if lits:
+            self.grow(lits)
+        index = self.arena.add(lits)
+        self.active.append(1)
+        self.marked.append(0)
+        self.pivots.append(lits[0] if lits else -1)
+        self.index.setdefault(tuple(sorted(lits)), []).append(index)
+        for lit in lits:
+            self.occurs.setdefault(lit, []).append(index)
+        if len(lits) == 1:
+            self.units[index] = lits[0]
+        elif len(lits) > 1:
+            self.watches[lits[0]].append(index)
+            self.watches[lits[1]].append(index)
+        return index
+
+    def deactivate(self, index):
+        """Takes a clause out of the active ones."""
+        self.active[index] = 0
+        self.units.pop(index, None)
+
+    def activate(self, index):
+        """Puts a clause back among the active ones."""
+        self.active[index] = 1
+        if self.arena.sizes[index] == 1:
+            self.units[index] = self.arena.lits[self.arena.starts[index]]
+
+    def find(self, lits):
+        """Gives the index of an active clause with exactly the given
+        literals, or None."""
+        for index in self.index.get(tuple(sorted(set(lits))), ()):
+            if self.active[index]:
+                return index
+        return None
+
+    def assign(self, lit, reason):
+        """Makes a literal true, or gives False if it's already false."""
+        values = self.values
+        if values[lit]:
+            return True
+        if values[lit ^ 1]:
+            return False
+        values[lit] = 1
+        if len(self.reasons) <= lit >> 1:
+            self.reasons.extend(array('i', [-1]) * (len(values) // 2 - len(self.reasons)))
+        self.reasons[lit >> 1] = reason
+        self.trail.append(lit)
+        return True
+
+    def reset(self):
+        """Unassigns everything."""
+        values = self.values
+        for lit in self.trail:
+            values[lit] = 0
+        self.trail = []
+
+    def propagate(self, assumed):
+        """Propagates the active units and the assumed literals from an
+        empty assignment.
+
+        Returns the index of the conflicting clause, or -1 for a conflict
+        between the assumptions themselves, or None if there's no conflict.
+        The assignment is left for conflict analysis; call reset after.
+        """
+        for index in self.index.get((), ()):
+            if self.active[index]:
+                return index
+        for index, lit in self.units.items():
+            if not self.assign(lit, index):
+                return index
+        for lit in assumed:
+            if not self.assign(lit, -1):
+                return -1
+        arena = self.arena
+        lits = arena.lits
+        starts = arena.starts
+        sizes = arena.sizes
+        active = self.active
+        values = self.values
+        trail = self.trail
+        head = 0
+        while head < len(trail):
+            false_lit = trail[head] ^ 1
+            head += 1
+            watchers = self.watches[false_lit]
+            kept = 0
+            i = 0
+            while i < len(watchers):
+                index = watchers[i]
+                i += 1
+                watchers[kept] = index
+                kept += 1
+                if not active[index]:
+                    continue
+                start = starts[index]
+                first = lits[start]
+                if first == false_lit:
+                    first = lits[start + 1]
+                    lits[start] = first
+                    lits[start + 1] = false_lit
+                if values[first]:
+                    continue
+                for position in range(start + 2, start + sizes[index]):
+                    lit = lits[position]
+                    if not values[lit ^ 1]:
+                        lits[start + 1] = lit
+                        lits[position] = false_lit
+                        self.watches[lit].append(index)
+                        kept -= 1
+                        break
+                else:
+                    if not values[first ^ 1]:
+                        self.assign(first, index)
+                    else:
+                        while i < len(watchers):
+                            watchers[kept] = watchers[i]
+                            kept += 1
+                            i += 1
+                        del watchers[kept:]
+                        return index
+            del watchers[kept:]
+        return None
+
+    def mark_conflict(self, conflict):
+        """Marks the clauses the last conflict was derived from."""
+        arena = self.arena
+        reasons = self.reasons
+        self.marked[conflict] = 1
+        seen = set()
+        stack = [conflict]
+        while stack:
+            index = stack.pop()
+            for lit in arena.literals(index):
+                var = lit >> 1
+                if var in seen:
+                    continue
+                seen.add(var)
+                reason = reasons[var] if self.values[lit ^ 1] else -1
+                if reason >= 0:
+                    self.marked[reason] = 1
+                    stack.append(reason)
+
+    def refutes(self, assumed, mark):
+        """Determines whether unit propagation refutes the assumed literals,
+        marking the clauses it used if mark is set."""
+        conflict = self.propagate(assumed)
+        if conflict is not None and conflict >= 0 and mark:
+            self.mark_conflict(conflict)
+        self.reset()
+        return conflict is not None
+
+    def implied(self, index, mark):
+        """Determines whether a lemma is RUP or RAT with respect to the
+        active clauses."""
+        negated = [lit ^ 1 for lit in self.arena.literals(index)]
+        if self.refutes(negated, mark):
+            return True
+        if not negated:
+            return False
+        # every resolvent on the first literal has to be RUP
+        self.rat += 1
+        pivot = self.pivots[index] ^ 1
+        for other in self.occurs.get(pivot, ()):
+            if not self.active[other]:
+                continue
+            lits = self.arena.literals(other)
+            assumed = negated + [lit ^ 1 for lit in lits if lit != pivot]
+            if not self.refutes(assumed, mark):
+                return False
+            if mark:
+                self.marked[other] = 1
+        return True
+
+    def replay(self, proof):
+        """Adds and deletes the proof's clauses up to the first conflict,
+        without checking anything.
+
+        Returns the steps taken as (deleted, index) pairs, and whether the
+        conflict was reached.
+        """
+        steps = []
+        for deleted, lits in proof:
+            if deleted:
+                index = self.find(lits)
+                if index is None:
+                    # drat-trim lets this pass too; nothing depends on it
+                    continue
+                self.deactivate(index)
+                self.deletions += 1
+                steps.append((True, index))
+                continue
+            index = self.add(lits)
+            self.lemmas += 1
+            steps.append((False, index))
+            # only a new unit or empty clause can bring on the conflict
+            if len(lits) <= 1 and self.refutes((), False):
+                return steps, True
+        return steps, self.refutes((), False)
+
+    def check_forward(self, proof):
+        """Checks every lemma of a proof in order.
+
+        Returns whether the proof refutes the clauses.
+        """
+        if self.refutes((), False):
+            return True
+        for deleted, lits in proof:
+            if deleted:
+                index = self.find(lits)
+                if index is not None:
+                    self.deactivate(index)
+                    self.deletions += 1
+                continue
+            index = self.add(lits)
+            self.lemmas += 1
+            self.deactivate(index)
+            self.checked += 1
+            if not self.implied(index, False):
+                self.failed = [to_dimacs(lit) for lit in lits]
+                return False
+            self.activate(index)
+            if len(lits) <= 1 and self.refutes((), False):
+                return True
+        return self.refutes((), False)
+
+    def check_backward(self, proof):
+        """Checks the lemmas of a proof that the refutation depends on, last
+        first.
+
+        Returns whether the proof refutes the clauses.
+        """
+        steps, refuted = self.replay(proof)
+        if not refuted:
+            return False
+        self.refutes((), True)
+        for deleted, index in reversed(steps):
+            if deleted:
+                self.activate(index)
+                continue
+            self.deactivate(index)
+            if not self.marked[index]:
+                continue
+            self.checked += 1
+            if not self.implied(index, True):
+                self.failed = [to_dimacs(lit) for lit in self.arena.literals(index)]
+                return False
+        return True
+
+    def check(self, proof, backward=True):
+        """Determines whether a proof, an iterable of steps like read_proof
+        gives, shows the clauses unsatisfiable."""
+        if backward:
+            return self.check_backward(proof)
+        return self.check_forward(proof)
+
+    def statistics(self):
+        """Gives the checking counters as a dictionary."""
+        return {
+            'lemmas': self.lemmas,
+            'checked': self.checked,
+            'deletions': self.deletions,
+            'rat_checks': self.rat,
+        }
+
+
+def check(formula, proof, backward=True, binary=None):
+    """Determines whether a DRAT proof shows a DIMACS formula
+    unsatisfiable.
+
+    formula and proof are paths or binary file objects, or formula can be a
+    WatchedClauses store already.
+    """
+    if not hasattr(formula, 'arena'):
+        formula = read_dimacs(formula)
+    return Checker(formula).check(read_proof(proof, binary), backward)
+
+
+def main(arguments=None):
+    """Checks a proof from the command line, printing s VERIFIED or
+    s NOT VERIFIED."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('formula', help='the DIMACS formula, maybe gzip\'d')
+    parser.add_argument('proof', help='the DRAT proof, binary or text')
+    parser.add_argument('--forward', action='store_true',
+                        help='check every lemma in order instead of backward')
+    options = parser.parse_args(arguments)
+    started = time.perf_counter()
+    checker = Checker(read_dimacs(options.formula))
+    verified = checker.check(read_proof(options.proof), not options.forward)
+    for name, value in checker.statistics().items():
+        print('c {}: {}'.format(name, value))
+    print('c seconds: {:.3f}'.format(time.perf_counter() - started))
+    if checker.failed is not None:
+        print('c failed lemma: {} 0'.format(' '.join(map(str, checker.failed))))
+    print('s VERIFIED' if verified else 's NOT VERIFIED')
+    return 0 if verified else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
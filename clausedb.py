@@ -0,0 +1,172 @@
+"""clausedb.py: keeping the learned clauses of a CDCL search in check.
+
+CDCL learns a clause from every conflict, and without pruning the clause
+store, and the time propagation spends in it, grow for as long as the
+search runs. A ClauseDatabase scores each learned clause and every so often
+deletes the ones least likely to help again, in three tiers by LBD (the
+number of decision levels among its literals, see CDCLSolver.lbd):
+
+    core    LBD up to core_lbd, kept for good
+    tier2   LBD up to tier2_lbd, kept as long as conflict analysis used it
+            since the last reduction
+    local   the rest, of which the less active half goes at each reduction
+
+A clause's activity goes up whenever conflict analysis uses it, by an
+amount that grows each conflict, so recent use counts for the most, and
+its LBD is worked out again then, so a clause can move up a tier. Clauses
+that are the reason for an assignment are never deleted.
+
+Reductions come first_reduce conflicts in, then reduce_increment conflicts
+further apart each time. Deleted clauses are compacted out of the arena
+straight away (see WatchedClauses.remove_clauses). Given a memory ceiling
+on the clause store, which counts its watch lists as well as its arena,
+the database also reduces whenever the store grows past it, then keeping
+only the core and tier2 clauses in use; the original clauses and the core
+can still take more than the ceiling, which can't go lower.
+"""
+
+from array import array
+
+from watched import TRUE
+
+# bytes in a megabyte, for the memory ceiling
+MEGABYTE = 1024 * 1024
+
+
+class ClauseDatabase:
+    """LBD and activity scores of a store's learned clauses, and the
+    reductions that delete the worst of them."""
+
+    core_lbd = 2
+    tier2_lbd = 6
+    first_reduce = 2000
+    reduce_increment = 300
+    activity_decay = 0.999
+
+    def __init__(self, engine, memory=None):
+        """Initializes the database for a WatchedClauses store.
+
+        memory is the ceiling on the clause store, in megabytes, or None.
+        """
+        self.engine = engine
+        self.memory = memory
+        # per clause index, like the arena; only learned clauses' count
+        self.lbds = array('i')
+        self.activity = array('d')
+        self.used = bytearray()
+        self.increment = 1.0
+        self.interval = self.first_reduce
+        self.next_reduce = self.first_reduce
+        self.last_reduce = 0
+        self.reductions = 0
+        self.deleted = 0
+
+    def grow(self):
+        """Makes room for the scores of every clause in the arena."""
+        missing = len(self.engine.arena) - len(self.lbds)
+        if missing > 0:
+            self.lbds.extend(array('i', [0]) * missing)
+            self.activity.extend(array('d', [0.0]) * missing)
+            self.used.extend(bytes(missing))
+
+    def learned(self, index, lbd):
+        """Starts scoring a new learned clause, which counts as used until
+        the next reduction."""
+        self.grow()
+        self.lbds[index] = lbd
+        self.activity[index] = self.increment
+        self.used[index] = 1
+
+    def bump(self, index):
+        """Notes that conflict analysis used a clause."""
+        if not self.engine.arena.learnt[index]:
+            return
+        self.grow()
+        self.used[index] = 1
+        self.activity[index] += self.increment
+        if self.activity[index] > 1e100:
+            # scale everything down before it overflows
+            for other in range(len(self.activity)):
+                self.activity[other] *= 1e-100
+            self.increment *= 1e-100
+        if self.lbds[index] > self.core_lbd:
+            levels = self.engine.levels
+            lbd = len({levels[lit >> 1] for lit in self.engine.arena.literals(index)})
+            if lbd < self.lbds[index]:
+                self.lbds[index] = lbd
+
+    def decay(self):
+        """Makes later bumps count for more; call once per conflict."""
+        self.increment /= self.activity_decay
+
+    def nbytes(self):
+        """Gives the number of bytes the clause store, its watch lists and the
+        scores take, as near as WatchedClauses.nbytes can estimate them."""
+        return (self.engine.nbytes() + len(self.used)
+                + self.lbds.itemsize * len(self.lbds)
+                + self.activity.itemsize * len(self.activity))
+
+    def over_memory(self):
+        """Determines whether the clause store is past the memory ceiling."""
+        return self.memory is not None and self.nbytes() > self.memory * MEGABYTE
+
+    def due(self, conflicts):
+        """Determines whether it's time for a reduction, after a number of
+        conflicts."""
+        if conflicts >= self.next_reduce:
+            return True
+        # past the ceiling, reduce as often as the shortest interval allows
+        return (conflicts - self.last_reduce >= self.reduce_increment
+                and self.over_memory())
+
+    def locked(self, index):
+        """Determines whether a clause is the reason for an assignment."""
+        engine = self.engine
+        first = engine.arena.lits[engine.arena.starts[index]]
+        return engine.values[first] == TRUE and engine.reasons[first >> 1] == index
+
+    def reduce(self, conflicts, proof=None):
+        """Deletes the learned clauses that scored worst, logging them to a
+        proof.DratWriter if given, and gives how many went."""
+        self.grow()
+        arena = self.engine.arena
+        learnt = arena.learnt
+        lbds = self.lbds
+        used = self.used
+        candidates = []
+        for index in range(len(arena)):
+            if not learnt[index] or lbds[index] <= self.core_lbd or self.locked(index):
+                continue
+            if lbds[index] <= self.tier2_lbd and used[index]:
+                used[index] = 0
+                continue
+            used[index] = 0
+            candidates.append(index)
+        if self.over_memory():
+            doomed = candidates
+        else:
+            candidates.sort(key=self.activity.__getitem__)
+            doomed = candidates[:len(candidates) // 2]
+        if proof is not None:
+            for index in doomed:
+                proof.delete(arena.literals(index))
+        if doomed:
+            remap = self.engine.remove_clauses(set(doomed))
+            kept = [index for index in range(len(remap)) if remap[index] >= 0]
+            self.lbds = array('i', (lbds[index] for index in kept))
+            self.activity = array('d', (self.activity[index] for index in kept))
+            self.used = bytearray(used[index] for index in kept)
+        self.reductions += 1
+        self.deleted += len(doomed)
+        self.last_reduce = conflicts
+        self.interval += self.reduce_increment
+        self.next_reduce = conflicts + self.interval
+        return len(doomed)
+
+    def statistics(self):
+        """Gives the database counters as a dictionary."""
+        return {
+            'reductions': self.reductions,
+            'deleted': self.deleted,
+            'clause_bytes': self.nbytes(),
+        }
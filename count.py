@@ -0,0 +1,247 @@
+"""count.py: exact model counting (#SAT).
+
+A ModelCounter branches like DPLL, on the trail of a WatchedClauses store
+with unit propagation (but no pure literals, which would lose models), and
+adds up the models of both branches instead of stopping at the first.
+
+What makes it feasible is splitting: after each branch the clauses that
+aren't satisfied yet often fall into groups that share no variables, and
+the number of models of the whole is the product of the groups' counts.
+Each group (component) is counted on its own, and its count is kept in a
+cache keyed by the component's remaining clauses, so a component that
+turns up again under other assignments is never counted twice. The cache
+drops the least recently used components once it holds cache_size of them.
+
+Variables that no remaining clause mentions can be anything, so each one
+doubles the count. Counts are Python ints, which never overflow.
+
+>>> ModelCounter(WatchedClauses([['A', 'B'], ['C']])).count()
+3
+
+The counts in progress are kept on a list rather than the call stack, so
+a formula can take as many decisions in a row as it has variables, like
+this chain of 1001 variables, whose count has 210 digits:
+
+>>> chain = [['X%d' % i, 'X%d' % (i + 1)] for i in range(1000)]
+>>> count_models(chain) % 1000000
+35877
+"""
+
+from collections import OrderedDict
+
+from watched import TRUE, UNASSIGNED, WatchedClauses
+
+
+class Product:
+    """A product of counts in progress: the models so far, and the
+    components still to count, with their clauses' unassigned literals."""
+
+    __slots__ = ('total', 'components', 'residual')
+
+    def __init__(self, total, components, residual):
+        """Initializes the product."""
+        self.total = total
+        self.components = components
+        self.residual = residual
+
+
+class Branching:
+    """The count of a component in progress: the models of the branches on
+    var tried so far, and the next polarity to try (2 when both are done)."""
+
+    __slots__ = ('key', 'clauses', 'variables', 'var', 'level', 'polarity', 'total')
+
+    def __init__(self, key, clauses, variables, var, level):
+        """Initializes the branching at a decision level, before either
+        branch."""
+        self.key = key
+        self.clauses = clauses
+        self.variables = variables
+        self.var = var
+        self.level = level
+        self.polarity = 0
+        self.total = 0
+
+
+class ModelCounter:
+    """Counts the models of a store's clauses, over all of its variables."""
+
+    def __init__(self, engine, cache_size=100000):
+        """Initializes the counter; cache_size is how many component counts
+        to keep."""
+        self.engine = engine
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.decisions = 0
+        self.components = 0
+        self.hits = 0
+        self.misses = 0
+
+    def residual(self, clauses):
+        """Gives the unassigned literals of each clause that isn't satisfied,
+        by clause index."""
+        arena = self.engine.arena
+        lits = arena.lits
+        values = self.engine.values
+        residual = {}
+        for index in clauses:
+            start = arena.starts[index]
+            free = []
+            for position in range(start, start + arena.sizes[index]):
+                lit = lits[position]
+                value = values[lit]
+                if value == TRUE:
+                    break
+                if value == UNASSIGNED:
+                    free.append(lit)
+            else:
+                residual[index] = free
+        return residual
+
+    def split(self, residual):
+        """Splits unsatisfied clauses into components sharing no variables.
+
+        Returns a list of (clause indices, variables) pairs.
+        """
+        parent = {}
+
+        def find(var):
+            """Gives the representative of a variable's group."""
+            root = var
+            while parent[root] != root:
+                root = parent[root]
+            while parent[var] != root:
+                parent[var], var = root, parent[var]
+            return root
+
+        for free in residual.values():
+            first = free[0] >> 1
+            parent.setdefault(first, first)
+            root = find(first)
+            for lit in free[1:]:
+                var = lit >> 1
+                parent.setdefault(var, var)
+                other = find(var)
+                if other != root:
+                    parent[other] = root
+        groups = {}
+        for index, free in residual.items():
+            groups.setdefault(find(free[0] >> 1), []).append(index)
+        components = []
+        for root, clauses in groups.items():
+            variables = {lit >> 1 for index in clauses for lit in residual[index]}
+            components.append((clauses, variables))
+        return components
+
+    def cached(self, clauses, residual):
+        """Gives the cache key of a component and its cached count, or None,
+        given its clauses and their unassigned literals."""
+        key = tuple(sorted(tuple(sorted(residual[index])) for index in clauses))
+        count = self.cache.get(key)
+        if count is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return key, count
+
+    def product(self, clauses, variables):
+        """Starts counting the models, over the given variables, of the given
+        clauses under the current assignment.
+
+        Gives a Product of the models of the unconstrained variables and
+        the components still to count.
+        """
+        residual = self.residual(clauses)
+        values = self.engine.values
+        constrained = {lit >> 1 for free in residual.values() for lit in free}
+        unconstrained = sum(1 for var in variables
+                            if values[2 * var] == UNASSIGNED and var not in constrained)
+        components = [component for component, _ in self.split(residual)]
+        return Product(1 << unconstrained, components, residual)
+
+    def branching(self, key, clauses, residual):
+        """Starts counting a component that isn't cached by branching on the
+        variable in the most of its clauses."""
+        self.components += 1
+        occurrences = {}
+        for index in clauses:
+            for lit in residual[index]:
+                occurrences[lit >> 1] = occurrences.get(lit >> 1, 0) + 1
+        var = max(occurrences, key=occurrences.get)
+        return Branching(key, clauses, set(occurrences), var,
+                         self.engine.decision_level())
+
+    def count_assigned(self, clauses, variables):
+        """Counts the models, over the given variables, of the given clauses
+        under the current assignment.
+
+        Instead of recursing per decision, the products and branchings in
+        progress are kept on a list, the innermost last, and each one that
+        finishes hands its count to the one before it.
+        """
+        engine = self.engine
+        stack = [self.product(clauses, variables)]
+        # the count of the frame that just finished, for the one under it
+        finished = None
+        while True:
+            frame = stack[-1]
+            if isinstance(frame, Product):
+                if finished is not None:
+                    frame.total *= finished
+                    finished = None
+                if frame.total == 0 or not frame.components:
+                    stack.pop()
+                    if not stack:
+                        return frame.total
+                    finished = frame.total
+                    continue
+                component = frame.components.pop()
+                key, finished = self.cached(component, frame.residual)
+                if finished is None:
+                    stack.append(self.branching(key, component, frame.residual))
+            else:
+                if finished is not None:
+                    frame.total += finished
+                    finished = None
+                engine.cancel_until(frame.level)
+                if frame.polarity == 2:
+                    self.cache[frame.key] = frame.total
+                    if len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+                    stack.pop()
+                    finished = frame.total
+                    continue
+                self.decisions += 1
+                engine.new_decision_level()
+                engine.assign(2 * frame.var + frame.polarity)
+                frame.polarity += 1
+                if engine.propagate() is None:
+                    stack.append(self.product(frame.clauses, frame.variables))
+
+    def count(self):
+        """Gives the number of models of the store's clauses, leaving out
+        learned ones."""
+        engine = self.engine
+        engine.cancel_until(0)
+        if not engine.ok or engine.propagate() is not None:
+            return 0
+        arena = engine.arena
+        clauses = [index for index in range(len(arena)) if not arena.learnt[index]]
+        return self.count_assigned(clauses, range(engine.num_variables))
+
+    def statistics(self):
+        """Gives the counting counters as a dictionary."""
+        return {
+            'decisions': self.decisions,
+            'components': self.components,
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_entries': len(self.cache),
+        }
+
+
+def count_models(representation, cache_size=100000):
+    """Counts the models of a list of clauses of string literals, over the
+    variables they mention."""
+    return ModelCounter(WatchedClauses(representation), cache_size).count()
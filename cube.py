@@ -0,0 +1,184 @@
+"""cube.py: cube-and-conquer, splitting a formula into independent cubes
+and solving each one in its own process.
+
+The cube phase branches the way DPLL does, deciding a variable both ways
+on the trail, but only to a fixed depth, and it picks each variable by
+lookahead: every candidate is propagated both ways and the one that
+assigns the most on both sides (the product of the two counts) wins. A
+side that conflicts is a failed literal, so the other side is forced
+straight away, and a variable that fails both ways refutes the branch.
+
+Each branch that reaches the depth gives a cube, the list of literals
+decided or forced along it. Cubes cover every branch that wasn't refuted,
+so the formula is satisfiable if any cube is and unsatisfiable only if
+every one of them is. The conquer phase solves the cubes with CDCL in a
+process pool and stops the rest once one is satisfiable.
+"""
+
+import math
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cdcl import CDCLSolver
+from heuristics import VariableOrder
+from portfolio import load
+
+
+def lookahead(engine, var):
+    """Propagates both literals of a variable and undoes them again.
+
+    Returns how many variables each side assigned, positive side first,
+    with None for a side that conflicts.
+    """
+    level = engine.decision_level()
+    base = len(engine.trail)
+    counts = []
+    for lit in (2 * var, 2 * var + 1):
+        engine.new_decision_level()
+        engine.assign(lit)
+        if engine.propagate() is None:
+            counts.append(len(engine.trail) - base)
+        else:
+            counts.append(None)
+        engine.cancel_until(level)
+    return counts
+
+
+def candidates(engine, limit):
+    """Gives up to limit unassigned variables, the ones appearing most in
+    the unsatisfied clauses first."""
+    occurrences = {}
+    for free in VariableOrder(engine).unsatisfied():
+        for lit in free:
+            occurrences[lit >> 1] = occurrences.get(lit >> 1, 0) + 1
+    return sorted(occurrences, key=occurrences.get, reverse=True)[:limit]
+
+
+def split(engine, depth, cube, cubes, limit=64):
+    """Splits the search below the current assignment into cubes.
+
+    cube holds the literals of the current branch and cubes collects the
+    finished ones. Returns a model if a branch happens to satisfy every
+    clause on the way, otherwise None.
+    """
+    if engine.propagate() is not None:
+        return None
+    if depth == 0:
+        cubes.append(list(cube))
+        return None
+    while True:
+        best = None
+        best_score = -1
+        for var in candidates(engine, limit):
+            positive, negative = lookahead(engine, var)
+            if positive is None and negative is None:
+                return None
+            if positive is None or negative is None:
+                # a failed literal: the other side holds on this whole branch
+                forced = 2 * var + (1 if positive is None else 0)
+                engine.assign(forced)
+                cube.append(forced)
+                if engine.propagate() is not None:
+                    return None
+                break
+            score = (positive + 1) * (negative + 1)
+            if score > best_score:
+                best = (var, positive >= negative)
+                best_score = score
+        else:
+            break
+    if best is None:
+        return engine.assignment()
+    var, positive_first = best
+    level = engine.decision_level()
+    length = len(cube)
+    for lit in ((2 * var, 2 * var + 1) if positive_first else (2 * var + 1, 2 * var)):
+        engine.new_decision_level()
+        engine.assign(lit)
+        cube.append(lit)
+        model = split(engine, depth - 1, cube, cubes, limit)
+        if model is not None:
+            return model
+        del cube[length:]
+        engine.cancel_until(level)
+    return None
+
+
+def make_cubes(engine, depth):
+    """Splits a store into cubes of at most depth decisions.
+
+    Returns the list of cubes, and a model instead if one turned up while
+    splitting.
+    """
+    cubes = []
+    model = split(engine, depth, [], cubes)
+    engine.cancel_until(0)
+    return cubes, model
+
+
+# set in each worker process by start_worker
+stop = None
+
+
+def start_worker(stop_flag):
+    """Keeps the shared stop flag in the worker process."""
+    global stop
+    stop = stop_flag
+
+
+def conquer(source, cube):
+    """Solves the formula with a cube's literals added as unit clauses.
+
+    Returns the answer (None if it was stopped) and the model if there is
+    one.
+    """
+    engine = load(source)
+    for lit in cube:
+        engine.add_literals([lit])
+    solver = CDCLSolver(engine)
+    solver.interrupt = stop.is_set
+    satisfiable = solver.solve()
+    if satisfiable:
+        stop.set()
+        return True, engine.assignment()
+    return satisfiable, None
+
+
+def solve(source, workers=None, depth=None):
+    """Solves a formula by cube-and-conquer.
+
+    source is a DIMACS path or a list of clauses of string literals. The
+    cubes go to workers processes, one per core by default, and depth
+    defaults to enough decisions for about four cubes per worker.
+
+    Returns a dictionary with whether the formula is satisfiable, the model
+    if it is, how many cubes there were and how many of them were solved
+    before the answer was known.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if depth is None:
+        depth = max(1, math.ceil(math.log2(4 * workers)))
+    cubes, model = make_cubes(load(source), depth)
+    answer = {'satisfiable': False, 'model': None, 'cubes': len(cubes), 'solved': 0}
+    if model is not None:
+        answer['satisfiable'] = True
+        answer['model'] = model
+        return answer
+    stop_flag = multiprocessing.Event()
+    with ProcessPoolExecutor(workers, initializer=start_worker,
+                             initargs=(stop_flag,)) as pool:
+        pending = {pool.submit(conquer, source, cube) for cube in cubes}
+        while pending and not answer['satisfiable']:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                satisfiable, model = future.result()
+                answer['solved'] += 1
+                if satisfiable:
+                    answer['satisfiable'] = True
+                    answer['model'] = model
+        stop_flag.set()
+        for future in pending:
+            future.cancel()
+    return answer
@@ -0,0 +1,169 @@
+"""dimacs.py: streaming DIMACS CNF reader and writer.
+
+A DIMACS file has comment lines starting with 'c', a header line
+'p cnf <variables> <clauses>', and then clauses as whitespace separated
+numbers, +v or -v, each clause ending with a 0:
+
+    c an example
+    p cnf 3 2
+    1 -3 0
+    2 3 -1 0
+
+read_dimacs parses a plain file through mmap, and a gzip'd file or any
+other binary stream through a buffered reader, a block of lines at a time.
+Literals are written straight onto the end of the store's clause arena, so
+memory grows with the arena and not with Python objects per clause.
+
+write_dimacs goes the other way. Variables with names, like the letters of
+a Sentence, get 'c var <number> <name>' comment lines, which read_dimacs
+uses to name them again.
+"""
+
+import gzip
+import mmap
+import re
+
+from watched import WatchedClauses
+
+# how much of a file to parse at a time
+BLOCK_SIZE = 1 << 20
+
+# lines that aren't clauses: comments, the header and the '%' SATLIB puts
+# before the end of its files
+SPECIAL_LINE = re.compile(rb'^[ \t]*[cp%].*$', re.M)
+NAME_COMMENT = re.compile(rb'c var (\d+) (\S+)')
+
+
+def read_dimacs(source, engine=None):
+    """Reads DIMACS clauses into a WatchedClauses store.
+
+    source is a path, which is read through gzip if it ends in '.gz', or a
+    binary file object. The clauses are added to engine if one is given,
+    otherwise to a new store. Returns the store.
+    """
+    if engine is None:
+        engine = WatchedClauses()
+    lits = engine.arena.lits
+    start = len(lits)
+    for block in blocks(source):
+        if SPECIAL_LINE.search(block):
+            block, finished = special_lines(block, engine)
+        else:
+            finished = False
+        num_variables = engine.num_variables
+        for number in map(int, block.split()):
+            if number == 0:
+                engine.close_clause(start)
+                start = len(lits)
+                continue
+            if number > 0:
+                var = number - 1
+                lit = 2 * var
+            else:
+                var = -number - 1
+                lit = 2 * var + 1
+            if var >= num_variables:
+                engine.new_variables(var + 1 - num_variables)
+                num_variables = var + 1
+            lits.append(lit)
+        if finished:
+            break
+    # a last clause missing its 0
+    if len(lits) > start:
+        engine.close_clause(start)
+    return engine
+
+
+def special_lines(block, engine):
+    """Handles the comment and header lines of a block.
+
+    Returns the block with only its clause lines left, and whether a '%'
+    line ended the formula.
+    """
+    finished = False
+    for match in SPECIAL_LINE.finditer(block):
+        line = match.group().strip()
+        if line.startswith(b'p'):
+            fields = line.split()
+            if len(fields) < 4 or fields[1] != b'cnf':
+                raise ValueError('not a DIMACS CNF header: {!r}'.format(line))
+            declared = int(fields[2])
+            if declared > engine.num_variables:
+                engine.new_variables(declared - engine.num_variables)
+        elif line.startswith(b'%'):
+            block = block[:match.start()]
+            finished = True
+            break
+        else:
+            named = NAME_COMMENT.fullmatch(line)
+            if named:
+                var = int(named.group(1)) - 1
+                if var >= engine.num_variables:
+                    engine.new_variables(var + 1 - engine.num_variables)
+                engine.name_variable(var, named.group(2).decode())
+    return SPECIAL_LINE.sub(b'', block), finished
+
+
+def blocks(source):
+    """Yields the bytes of a DIMACS source in blocks of whole lines."""
+    if not isinstance(source, str):
+        yield from stream_blocks(source)
+    elif source.endswith('.gz'):
+        with gzip.open(source, 'rb') as stream:
+            yield from stream_blocks(stream)
+    else:
+        with open(source, 'rb') as stream:
+            try:
+                mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # an empty file can't be mapped
+                return
+            with mapped:
+                position = 0
+                while position < len(mapped):
+                    end = mapped.find(b'\n', position + BLOCK_SIZE)
+                    end = len(mapped) if end == -1 else end + 1
+                    yield mapped[position:end]
+                    position = end
+
+
+def stream_blocks(stream):
+    """Yields the bytes of a binary stream in blocks of whole lines."""
+    while True:
+        block = stream.read(BLOCK_SIZE)
+        if not block:
+            return
+        yield block + stream.readline()
+
+
+def write_dimacs(engine, target):
+    """Writes the clauses of a WatchedClauses store as DIMACS.
+
+    Learned clauses are left out. target is a path, which is written
+    through gzip if it ends in '.gz', or a binary file object.
+    """
+    if isinstance(target, str):
+        opener = gzip.open if target.endswith('.gz') else open
+        with opener(target, 'wb') as stream:
+            write_dimacs(engine, stream)
+        return
+    arena = engine.arena
+    lits = arena.lits
+    learnt = arena.learnt
+    num_clauses = len(arena) - sum(learnt)
+    target.write('p cnf {} {}\n'.format(engine.num_variables, num_clauses).encode())
+    for var in sorted(engine.names):
+        target.write('c var {} {}\n'.format(var + 1, engine.names[var]).encode())
+    lines = []
+    for index in range(len(arena)):
+        if learnt[index]:
+            continue
+        start = arena.starts[index]
+        numbers = [str(-(lit >> 1) - 1 if lit & 1 else (lit >> 1) + 1)
+                   for lit in lits[start:start + arena.sizes[index]]]
+        numbers.append('0\n')
+        lines.append(' '.join(numbers))
+        if len(lines) == 4096:
+            target.write(''.join(lines).encode())
+            lines = []
+    target.write(''.join(lines).encode())
@@ -21,25 +21,73 @@ None
 ...       (~x, ~y, z)])
 {'y': True, 'x': True, 'z': True}
 Variable objects are identical when their names are.
+
+CDCL takes the same clauses and gives the same kind of answer, but learns a
+clause from every conflict instead of backtracking chronologically, so the
+two can be compared on the same formula.
 """
 
+import asyncio
+import functools
+import operator
+import weakref
+
+import allsat
+import cdcl
+import count
+from arena import complement, make_literal
+from budget import Budget, CancelToken
+from heuristics import make_heuristic
+from result import Result
+from stats import Statistics
+from watched import WatchedClauses
+
 """
 Whats in the parenthesis is or'ed together and on the outside of the parenthesis is anded
 """
 
 
 class Var:
-    """A simple variable class for expressing CNF formulae."""
-    def __init__(self, name):
-        """Initializes the variable."""
-        self.name = name
-        self.inverted = False
+    """A simple variable class for expressing CNF formulae.
+
+    Variables are interned: Var(name) always gives the same object for the
+    same name, and ~var the same inverted one, so comparing and hashing
+    them is by identity, as fast as for any object, and they can go in sets
+    and dictionaries. A variable is only interned while something refers to
+    it, so the table doesn't grow with every name ever used. compile_clauses
+    numbers the variables for each store by name.
+    """
+
+    __slots__ = ('name', 'inverted', 'inverse', '__weakref__')
+
+    # the variables in use, by name
+    interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, name):
+        """Gives the variable with a name, making it and its inverse if it's
+        new."""
+        var = cls.interned.get(name)
+        if var is not None:
+            return var
+        var = object.__new__(cls)
+        inverse = object.__new__(cls)
+        var.name = inverse.name = name
+        var.inverted = False
+        inverse.inverted = True
+        var.inverse = inverse
+        inverse.inverse = var
+        # if another thread got there first, use its variable
+        return cls.interned.setdefault(name, var)
 
     def __invert__(self):
         """Inverts the variable."""
-        inverse = self.__class__(self.name)
-        inverse.inverted = not self.inverted
-        return inverse
+        return self.inverse
+
+    def __reduce__(self):
+        """Pickles the variable by name, so it's interned again on loading."""
+        if self.inverted:
+            return operator.invert, (Var(self.name),)
+        return Var, (self.name,)
 
     def __str__(self):
         """Gives a short string representation of the variable."""
@@ -49,14 +97,6 @@ class Var:
         """Gives a precise string representation of the variable."""
         return 'Var(name={}, inverted={})'.format(self.name, self.inverted)
 
-    def __eq__(self, other):
-        """Determines whether two variables are equal."""
-        return self.name == other.name and self.inverted == other.inverted
-
-    def __ne__(self, other):
-        """Determines whether two variables aren't equal."""
-        return not self.__eq__(other)
-
 
 def assign_to_true(var, clauses):
     """Assigns a variable to true in an expression, then simplifies."""
@@ -73,59 +113,234 @@ def assign_to_true(var, clauses):
 def find_pure_vars(clauses):
     """Finds all pure variables in a list of clauses."""
     seen_vars = [var for clause in clauses for var in clause]
-    return [var for var in seen_vars if ~var not in seen_vars]
-
-
-def DPLL(clauses):
-    def DPLL_helper(clauses, values):
-        """Determines if a list of CNF formulae is solvable."""
-        # If all we have are literals, test if they're consistent
-        if all([len(clause) == 1 for clause in clauses]):
-            seen_vars = []
-            for (var,) in clauses:
-                for seen_var in seen_vars:
-                    name_match = (seen_var.name == var.name)
-                    is_opposite = (seen_var.inverted != var.inverted)
-                    if name_match and is_opposite:
-                        return None
-                seen_vars.append(var)
-                values[var.name] = not var.inverted
-            return values
-
-        # Perform unit propagation on every unit clause
-        unit_clauses = [clause for clause in clauses if len(clause) == 1]
-        for unit_clause in unit_clauses:
-            (var,) = unit_clause
-            clauses = assign_to_true(var, clauses)
-            values[var.name] = not var.inverted
-
-        # Find pure literals and assign them properly
-        for var in find_pure_vars(clauses):
-            clauses = assign_to_true(var, clauses)
-            values[var.name] = not var.inverted
-
-        # Check if we're done
-        if len(clauses) == 0:
-            return values
-
-        # If we have any empty clauses, we can't satisfy those
-        if any([len(clause) == 0 for clause in clauses]):
+    seen = {(var.name, var.inverted) for var in seen_vars}
+    return [var for var in seen_vars if (var.name, not var.inverted) not in seen]
+
+
+def compile_clauses(clauses):
+    """Turns a list of tuples of variables into a WatchedClauses store.
+
+    Each variable is looked up once, and its literal after that by the
+    variable itself, and the literals go straight onto the end of the
+    store's arena, with no list per clause.
+    """
+    engine = WatchedClauses()
+    lits = engine.arena.lits
+    literals = {}
+    for clause in clauses:
+        start = len(lits)
+        for var in clause:
+            lit = literals.get(var)
+            if lit is None:
+                lit = make_literal(engine.variable(var.name), var.inverted)
+                literals[var] = lit
+            lits.append(lit)
+        engine.close_clause(start)
+    return engine
+
+
+def search(engine, order, stats, interrupt=None, proof=None):
+    """Determines if a store's clauses are solvable, branching in place on
+    its trail with chronological backtracking.
+
+    The literal still to try at each decision level is kept in a list
+    instead of on the call stack, so the search can go as deep as there are
+    variables. interrupt, if given, is called after every conflict and
+    every CDCLSolver.interrupt_interval decisions, and stops the search when
+    it says to. proof, a proof.DratWriter, gets a
+    lemma for every conflict, pure literal and level backtracked out of,
+    ending in the empty clause when the answer is False. Any decisions
+    the store already holds are undone first, as CDCLSolver.solve does.
+    Returns True, False, or None if it was interrupted; on True the store
+    holds a satisfying assignment.
+    """
+    engine.cancel_until(0)
+    if not engine.ok:
+        if proof is not None:
+            proof.add(())
+        return False
+    # for each decision level, the other polarity of its decision, or None
+    # once both have been tried
+    untried = []
+    while True:
+        # Perform unit propagation, then assign pure literals, until neither
+        # has anything left to do
+        while True:
+            assigned = len(engine.trail)
+            conflict = engine.propagate()
+            stats.propagations += len(engine.trail) - assigned
+            if conflict is not None:
+                break
+            pure_vars = engine.pure_literals()
+            if len(pure_vars) == 0:
+                break
+            for var in pure_vars:
+                if proof is not None:
+                    proof.add_implied(engine, [var])
+                engine.assign(var)
+
+        if conflict is None:
+            # Explore by choosing a literal, if there's anything left to satisfy
+            lit = order.pick()
+            if lit is None:
+                return True
+            untried.append(complement(lit))
+        else:
+            stats.conflicts += 1
+            if proof is not None:
+                proof.add_implied(engine)
+            if stats.progress is not None and stats.conflicts >= stats.next_report:
+                stats.report()
+            order.conflict(lit >> 1 for lit in engine.arena.literals(conflict))
+            if interrupt is not None and interrupt():
+                return None
+            # Go back to the deepest decision with a polarity left to try
+            while untried and untried[-1] is None:
+                untried.pop()
+                if proof is not None:
+                    proof.add_implied(engine, levels=len(untried))
+            if not untried:
+                return False
+            lit = untried[-1]
+            untried[-1] = None
+            engine.cancel_until(len(untried) - 1)
+        stats.decisions += 1
+        if (interrupt is not None
+                and stats.decisions % cdcl.CDCLSolver.interrupt_interval == 0
+                and interrupt()):
             return None
+        if stats.trace is not None:
+            stats.trace('decide', engine.decode(lit), len(untried))
+        engine.new_decision_level()
+        engine.assign(lit)
+
+
+def DPLL(clauses, heuristic='first', stats=None):
+    """Determines if a list of CNF formulae is solvable.
+
+    heuristic names how to pick the variable to branch on: 'first', 'moms',
+    'jw' or 'vsids' (see heuristics.py). stats is a Statistics to count
+    decisions, propagations and conflicts into (see stats.py).
+    """
+    engine = compile_clauses(clauses)
+    order = make_heuristic(heuristic, engine)
+    if stats is None:
+        stats = Statistics()
+    stats.start()
+    try:
+        satisfiable = search(engine, order, stats)
+    finally:
+        stats.stop()
+    if satisfiable:
+        return engine.assignment()
+    return None
+
+
+def CDCL(clauses, heuristic='vsids', restarts='luby'):
+    """Determines if a list of CNF formulae is solvable, learning clauses
+    from conflicts and backjumping non-chronologically.
+
+    restarts names the restart policy: 'none', 'luby', 'geometric' or
+    'glucose' (see restarts.py).
+    """
+    engine = compile_clauses(clauses)
+    if cdcl.CDCLSolver(engine, heuristic, restarts).solve():
+        return engine.assignment()
+    return None
+
+
+def models(clauses, projection=None, cubes=False):
+    """Yields every model of a list of CNF formulae, as dictionaries of name
+    to value, where DPLL gives only the first.
+
+    projection is a list of variables (or names) to project the models
+    onto, and cubes leaves out the variables a model doesn't care about;
+    see allsat.py.
+    """
+    if projection is not None:
+        projection = [getattr(var, 'name', var) for var in projection]
+    return allsat.models(compile_clauses(clauses), projection, cubes)
+
+
+def count_models(clauses):
+    """Gives the number of models of a list of CNF formulae, as an int,
+    without enumerating them; see count.py."""
+    return count.ModelCounter(compile_clauses(clauses)).count()
+
+
+def solve(clauses, method='dpll', heuristic=None, interrupt=None, proof=None,
+          budget=None, cache=None):
+    """Solves a list of CNF formulae with DPLL or CDCL (method 'dpll' or
+    'cdcl'), without recursion and without printing.
+
+    heuristic defaults to 'first' for DPLL and 'vsids' for CDCL. interrupt,
+    if given, is a function saying when to give up. proof, if given, is a
+    proof.DratWriter to log a DRAT proof to, for the clauses as
+    compile_clauses numbers them. budget, a budget.Budget, limits the
+    search, and the limit that stopped it is in the statistics as stopped.
+    cache, a cache.ResultCache, gives back the answer for clauses solved
+    before, with cached in the statistics, and keeps new answers; it is
+    left alone when there's a proof to log, which a cached answer hasn't.
+    Returns a Result.
+    """
+    key = None
+    if cache is not None and proof is None:
+        clauses = list(clauses)
+        key, names, result = cache.lookup([str(var) for var in clause]
+                                          for clause in clauses)
+        if result is not None:
+            return result
+    engine = compile_clauses(clauses)
+    stats = Statistics()
+    if budget is not None:
+        budget.start(stats, interrupt)
+        interrupt = budget
+    if method == 'dpll':
+        order = make_heuristic(heuristic or 'first', engine)
+        stats.start()
+        try:
+            answer = search(engine, order, stats, interrupt, proof)
+        finally:
+            stats.stop()
+    elif method == 'cdcl':
+        solver = cdcl.CDCLSolver(engine, heuristic or 'vsids', stats=stats)
+        solver.interrupt = interrupt
+        solver.proof = proof
+        answer = solver.solve()
+    else:
+        raise ValueError('unknown method {!r}, expected dpll or cdcl'.format(method))
+    statistics = stats.as_dict()
+    if answer is None and budget is not None:
+        statistics['stopped'] = budget.exhausted
+    result = Result.from_answer(answer, engine.assignment(), statistics)
+    if key is not None:
+        cache.put(key, names, result)
+    return result
 
-        # Explore by choosing a literal
-        var = clauses[0][0]
 
-        # Try assinging the variable to true
-        values[var.name] = not var.inverted
-        with_true = DPLL_helper(assign_to_true(var, clauses), values)
-        if with_true is not None:
-            return with_true
+async def solve_async(clauses, method='cdcl', heuristic=None, budget=None,
+                      executor=None):
+    """Solves a list of CNF formulae like solve, in an executor, so an
+    asyncio event loop carries on while it runs.
 
-        # Try assigning the variable to false
-        values[var.name] = var.inverted
-        with_false = DPLL_helper(assign_to_true(var, clauses), values)
-        return with_false
-    return DPLL_helper(clauses, {})
+    executor defaults to the loop's thread pool; it has to run threads, so
+    the budget's token reaches the search. Cancelling the coroutine, or a
+    timeout from asyncio.wait_for, cancels the token and waits for the
+    search to stop before passing the cancellation on. Returns a Result.
+    """
+    if budget is None:
+        budget = Budget()
+    if budget.token is None:
+        budget.token = CancelToken()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, functools.partial(
+        solve, clauses, method, heuristic, budget=budget))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        budget.token.cancel()
+        await asyncio.wait([future])
+        raise
 
 def main():
  x = Var('x')
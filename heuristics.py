@@ -0,0 +1,306 @@
+"""heuristics.py: decision heuristics for DPLL and CDCL.
+
+A heuristic picks the literal to branch on next from a WatchedClauses store.
+pick() gives None when there is nothing left to decide, which for every
+heuristic here means the clauses are all satisfied.
+
+    first   the first unassigned literal of the first unsatisfied clause
+    moms    Maximum Occurrences in clauses of Minimum Size
+    jw      two-sided Jeroslow-Wang, weighting each clause by 2 ** -size
+    vsids   variable activity bumped in conflicts and decayed over time
+            (EVSIDS), kept in an indexed max-heap; the polarity is the one
+            the variable last had (phase saving) unless phase_saving is off
+
+first, moms and jw look at the unsatisfied clauses on every pick, the way
+the plain DPLL path always has. vsids picks and updates in O(log n).
+"""
+
+from watched import TRUE, UNASSIGNED
+
+
+class VariableOrder:
+    """Picks the first unassigned literal of the first unsatisfied clause."""
+
+    # whether to branch on a variable's last polarity, for heuristics that
+    # pick variables rather than literals
+    phase_saving = True
+
+    def __init__(self, engine):
+        """Initializes the heuristic for a store."""
+        self.engine = engine
+        engine.order = None
+
+    def pick(self):
+        """Gives the literal to branch on, or None if all clauses are
+        satisfied."""
+        engine = self.engine
+        index = engine.unsatisfied_clause()
+        if index is None:
+            return None
+        for lit in engine.arena.literals(index):
+            if engine.values[lit] == UNASSIGNED:
+                return lit
+        return None
+
+    def conflict(self, variables):
+        """Hears about the variables involved in a conflict."""
+
+    def unassigned(self, var):
+        """Hears about a variable the store has just unassigned."""
+
+    def randomize(self, rng):
+        """Breaks ties in the order at random."""
+
+    def unsatisfied(self):
+        """Yields the unassigned literals of each unsatisfied clause."""
+        engine = self.engine
+        arena = engine.arena
+        lits = arena.lits
+        values = engine.values
+        for index in range(len(arena)):
+            if arena.learnt[index]:
+                continue
+            start = arena.starts[index]
+            free = []
+            for position in range(start, start + arena.sizes[index]):
+                lit = lits[position]
+                value = values[lit]
+                if value == TRUE:
+                    break
+                if value == UNASSIGNED:
+                    free.append(lit)
+            else:
+                yield free
+
+
+class JeroslowWang(VariableOrder):
+    """Picks the variable whose literals appear most in short clauses."""
+
+    def pick(self):
+        """Gives the literal to branch on, or None if all clauses are
+        satisfied."""
+        scores = {}
+        for free in self.unsatisfied():
+            weight = 2.0 ** -len(free)
+            for lit in free:
+                scores[lit] = scores.get(lit, 0.0) + weight
+        best = None
+        best_score = -1.0
+        for lit, score in scores.items():
+            total = score + scores.get(lit ^ 1, 0.0)
+            if total > best_score or (total == best_score and score > scores[best]):
+                best = lit
+                best_score = total
+        return best
+
+
+class MOMS(VariableOrder):
+    """Picks the variable appearing most in the shortest unsatisfied clauses."""
+
+    # how much more the total count weighs than the balance between polarities
+    weight = 2 ** 10
+
+    def pick(self):
+        """Gives the literal to branch on, or None if all clauses are
+        satisfied."""
+        counts = {}
+        shortest = None
+        for free in self.unsatisfied():
+            if shortest is None or len(free) < shortest:
+                shortest = len(free)
+                counts = {}
+            if len(free) == shortest:
+                for lit in free:
+                    counts[lit] = counts.get(lit, 0) + 1
+        best = None
+        best_score = -1
+        for lit, count in counts.items():
+            other = counts.get(lit ^ 1, 0)
+            score = (count + other) * self.weight + count * other
+            if score > best_score or (score == best_score and count > counts[best]):
+                best = lit
+                best_score = score
+        return best
+
+
+class VariableHeap:
+    """A binary max-heap of variables ordered by activity, which knows where
+    each variable is so it can be moved up when its activity grows."""
+
+    def __init__(self, activity):
+        """Initializes an empty heap over a list of activities."""
+        self.activity = activity
+        self.heap = []
+        self.positions = []
+
+    def __len__(self):
+        """Gives the number of variables in the heap."""
+        return len(self.heap)
+
+    def __contains__(self, var):
+        """Determines whether a variable is in the heap."""
+        return var < len(self.positions) and self.positions[var] >= 0
+
+    def insert(self, var):
+        """Adds a variable if it isn't already in the heap."""
+        while len(self.positions) <= var:
+            self.positions.append(-1)
+        if self.positions[var] >= 0:
+            return
+        self.heap.append(var)
+        self.positions[var] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def increased(self, var):
+        """Restores the heap after a variable's activity went up."""
+        if var in self:
+            self.sift_up(self.positions[var])
+
+    def pop(self):
+        """Removes and gives the variable with the highest activity."""
+        heap = self.heap
+        top = heap[0]
+        last = heap.pop()
+        self.positions[top] = -1
+        if heap:
+            heap[0] = last
+            self.positions[last] = 0
+            self.sift_down(0)
+        return top
+
+    def sift_up(self, position):
+        """Moves the variable at a position up to where it belongs."""
+        heap = self.heap
+        activity = self.activity
+        var = heap[position]
+        score = activity[var]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if activity[heap[parent]] >= score:
+                break
+            heap[position] = heap[parent]
+            self.positions[heap[position]] = position
+            position = parent
+        heap[position] = var
+        self.positions[var] = position
+
+    def sift_down(self, position):
+        """Moves the variable at a position down to where it belongs."""
+        heap = self.heap
+        activity = self.activity
+        var = heap[position]
+        score = activity[var]
+        size = len(heap)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and activity[heap[child + 1]] > activity[heap[child]]:
+                child += 1
+            if activity[heap[child]] <= score:
+                break
+            heap[position] = heap[child]
+            self.positions[heap[position]] = position
+            position = child
+        heap[position] = var
+        self.positions[var] = position
+
+
+class VSIDS(VariableOrder):
+    """Picks the unassigned variable with the highest activity.
+
+    Every variable in a conflict has its activity bumped by an increment
+    that grows after each conflict, which decays older bumps without
+    touching every variable (EVSIDS).
+    """
+
+    def __init__(self, engine, decay=0.95):
+        """Initializes the heuristic for a store, with every variable at
+        zero activity."""
+        super().__init__(engine)
+        engine.order = self
+        self.decay = decay
+        self.increment = 1.0
+        self.activity = []
+        self.heap = VariableHeap(self.activity)
+        self.grow()
+
+    def grow(self):
+        """Takes in any variables added to the store since the last call."""
+        values = self.engine.values
+        for var in range(len(self.activity), self.engine.num_variables):
+            self.activity.append(0.0)
+            if values[2 * var] == UNASSIGNED:
+                self.heap.insert(var)
+
+    def pick(self):
+        """Gives a literal of the most active unassigned variable, or None if
+        every variable is assigned. The literal is negative, or has the
+        variable's saved phase when phase saving is on."""
+        if len(self.activity) < self.engine.num_variables:
+            self.grow()
+        values = self.engine.values
+        heap = self.heap
+        while len(heap):
+            var = heap.pop()
+            if values[2 * var] == UNASSIGNED:
+                if self.phase_saving:
+                    return 2 * var + self.engine.phases[var]
+                return 2 * var + 1
+        return None
+
+    def randomize(self, rng):
+        """Gives every variable a tiny random starting activity, far below
+        a single bump, so ties between variables break differently."""
+        if len(self.activity) < self.engine.num_variables:
+            self.grow()
+        for var in range(len(self.activity)):
+            self.activity[var] += rng.random() * 1e-5
+        variables = list(self.heap.heap)
+        self.heap = VariableHeap(self.activity)
+        for var in variables:
+            self.heap.insert(var)
+
+    def bump(self, var):
+        """Raises a variable's activity by the current increment."""
+        if var >= len(self.activity):
+            # added to the store since the last pick, and in a conflict
+            # before any pick
+            self.grow()
+        activity = self.activity
+        activity[var] += self.increment
+        if activity[var] > 1e100:
+            # scale everything down before the floats overflow
+            for other in range(len(activity)):
+                activity[other] *= 1e-100
+            self.increment *= 1e-100
+        self.heap.increased(var)
+
+    def conflict(self, variables):
+        """Bumps every variable involved in a conflict, then decays."""
+        for var in variables:
+            self.bump(var)
+        self.increment /= self.decay
+
+    def unassigned(self, var):
+        """Puts an unassigned variable back in the heap."""
+        if var >= len(self.activity):
+            # added to the store and assigned since the last pick
+            self.grow()
+        self.heap.insert(var)
+
+
+HEURISTICS = {
+    'first': VariableOrder,
+    'moms': MOMS,
+    'jw': JeroslowWang,
+    'vsids': VSIDS,
+}
+
+
+def make_heuristic(name, engine):
+    """Builds the heuristic with the given name for a store."""
+    if name not in HEURISTICS:
+        raise ValueError('unknown heuristic {!r}, expected one of {}'.format(
+            name, ', '.join(sorted(HEURISTICS))))
+    return HEURISTICS[name](engine)
@@ -0,0 +1,76 @@
+"""incremental.py: one solver for many closely related formulas.
+
+An IncrementalSolver keeps its clause store, its learned clauses and its
+heuristic's activities and saved phases from one solve() to the next, so a
+formula that grows a few clauses at a time, or is asked about under
+different assumptions, is never solved from scratch.
+
+>>> solver = IncrementalSolver([['A', 'B'], ['~A', 'C']])
+>>> solver.solve(['A', '~C'])
+False
+>>> solver.failed
+['~C', 'A']
+>>> solver.add_clause(['~B'])
+>>> solver.solve()
+True
+>>> solver.model()
+{'B': False, 'A': True, 'C': True}
+
+Clauses added since the last solve can conflict with the assumptions
+straight away, before the heuristic has picked anything:
+
+>>> solver = IncrementalSolver([['A', 'B'], ['~A', 'B']])
+>>> solver.solve(['~B'])
+False
+>>> solver.failed
+['~B']
+"""
+
+from cdcl import CDCLSolver
+from watched import WatchedClauses
+
+
+class IncrementalSolver:
+    """A CDCL solver that clauses can be added to between calls to solve."""
+
+    def __init__(self, representation=(), heuristic='vsids', restarts='luby'):
+        """Initializes the solver with a list of clauses of string literals;
+        heuristic and restarts are as for CDCLSolver."""
+        self.engine = WatchedClauses()
+        self.solver = CDCLSolver(self.engine, heuristic, restarts)
+        self.failed = []
+        for clause in representation:
+            self.add_clause(clause)
+
+    def add_clause(self, clause):
+        """Adds a clause of string literals, for every later call to solve."""
+        self.engine.cancel_until(0)
+        self.engine.add_clause(clause)
+
+    def solve(self, assumptions=()):
+        """Determines if the clauses are satisfiable with the assumed string
+        literals true.
+
+        If they aren't, failed lists the assumptions that can't all hold
+        together, or is empty if the clauses are unsatisfiable on their own
+        (after which every call gives False).
+        """
+        engine = self.engine
+        engine.cancel_until(0)
+        lits = [engine.encode(letter) for letter in assumptions]
+        satisfiable = self.solver.solve(lits)
+        self.failed = [engine.decode(lit) for lit in self.solver.failed]
+        return satisfiable
+
+    def model(self):
+        """Gives the assignment found by the last successful solve, as a
+        dictionary of name to value."""
+        return self.engine.assignment()
+
+    def statistics(self):
+        """Gives the search counters, totalled over every call, and the
+        size of the clause store."""
+        statistics = self.solver.statistics()
+        statistics['variables'] = self.engine.num_variables
+        statistics['clauses'] = len(self.engine.arena)
+        return statistics
@@ -0,0 +1,233 @@
+"""localsearch.py: stochastic local search (WalkSAT and ProbSAT).
+
+Local search starts from a random complete assignment and flips one
+variable at a time, picked from a random unsatisfied clause, until every
+clause is satisfied or it runs out of flips. It can't show a formula is
+unsatisfiable, but on large satisfiable random formulas it finds models far
+faster than systematic search.
+
+    walksat  flip a variable that breaks nothing if there is one; otherwise,
+             with probability noise, a random one, else one that breaks the
+             fewest clauses (WalkSAT/SKC)
+    probsat  flip a variable with probability proportional to
+             (eps + break) ** -cb (ProbSAT, polynomial break)
+
+A flip only touches the clauses the variable's literals are in. Each clause
+keeps how many of its literals are true and the xor of their variables, so
+when one literal is left true the xor is its variable, which makes the
+break count (how many clauses the flip would make false) and make count
+(how many unsatisfied clauses it would make true) of every variable cheap to
+keep up to date. The unsatisfied clauses are a list with each clause's
+position in it, so adding and removing one is O(1).
+
+Besides solving on its own, local search can warm up a complete solver:
+phases() writes the best assignment it saw into the store's saved phases,
+which CDCL and VSIDS branch on first.
+"""
+
+import random
+
+from watched import WatchedClauses
+
+
+class LocalSearch:
+    """WalkSAT and ProbSAT over the clauses of a WatchedClauses store."""
+
+    def __init__(self, engine, seed=None):
+        """Compiles a store's clauses, leaving out learned ones."""
+        self.engine = engine
+        self.rng = random.Random(seed)
+        arena = engine.arena
+        self.clauses = [arena.literals(index) for index in range(len(arena))
+                        if not arena.learnt[index]]
+        num_variables = engine.num_variables
+        self.occurs = [[] for _ in range(2 * num_variables)]
+        for number, clause in enumerate(self.clauses):
+            for lit in clause:
+                self.occurs[lit].append(number)
+        self.values = [0] * num_variables
+        self.true_counts = [0] * len(self.clauses)
+        self.critical = [0] * len(self.clauses)
+        self.breaks = [0] * num_variables
+        self.makes = [0] * num_variables
+        self.unsat = []
+        self.unsat_positions = [-1] * len(self.clauses)
+        self.best = None
+        self.best_unsat = len(self.clauses) + 1
+        self.flips = 0
+        self.tries = 0
+
+    def is_true(self, lit):
+        """Determines whether a literal is true under the current assignment."""
+        return self.values[lit >> 1] != lit & 1
+
+    def reset(self, values):
+        """Starts from a new assignment, a list of 1 (true) or 0 (false) per
+        variable, and counts everything up from scratch."""
+        self.values = values
+        self.breaks = [0] * len(values)
+        self.makes = [0] * len(values)
+        self.unsat = []
+        self.unsat_positions = [-1] * len(self.clauses)
+        for number, clause in enumerate(self.clauses):
+            count = 0
+            critical = 0
+            for lit in clause:
+                if values[lit >> 1] != lit & 1:
+                    count += 1
+                    critical ^= lit >> 1
+            self.true_counts[number] = count
+            self.critical[number] = critical
+            if count == 0:
+                self.add_unsat(number)
+            elif count == 1:
+                self.breaks[critical] += 1
+
+    def add_unsat(self, number):
+        """Marks a clause unsatisfied; every variable in it now makes it."""
+        self.unsat_positions[number] = len(self.unsat)
+        self.unsat.append(number)
+        for lit in self.clauses[number]:
+            self.makes[lit >> 1] += 1
+
+    def remove_unsat(self, number):
+        """Marks a clause satisfied again, swapping the last unsatisfied
+        clause into its place."""
+        position = self.unsat_positions[number]
+        last = self.unsat.pop()
+        if last != number:
+            self.unsat[position] = last
+            self.unsat_positions[last] = position
+        self.unsat_positions[number] = -1
+        for lit in self.clauses[number]:
+            self.makes[lit >> 1] -= 1
+
+    def flip(self, var):
+        """Flips a variable, updating the clauses its literals are in."""
+        values = self.values
+        values[var] ^= 1
+        # the literal of var that just became true
+        lit = 2 * var + (values[var] ^ 1)
+        true_counts = self.true_counts
+        critical = self.critical
+        breaks = self.breaks
+        for number in self.occurs[lit]:
+            count = true_counts[number] + 1
+            true_counts[number] = count
+            if count == 1:
+                self.remove_unsat(number)
+                breaks[var] += 1
+            elif count == 2:
+                breaks[critical[number]] -= 1
+            critical[number] ^= var
+        for number in self.occurs[lit ^ 1]:
+            count = true_counts[number] - 1
+            true_counts[number] = count
+            critical[number] ^= var
+            if count == 0:
+                breaks[var] -= 1
+                self.add_unsat(number)
+            elif count == 1:
+                breaks[critical[number]] += 1
+        self.flips += 1
+
+    def walksat_pick(self, clause, noise):
+        """Picks the variable to flip in an unsatisfied clause, WalkSAT style."""
+        breaks = self.breaks
+        best = []
+        best_break = None
+        for lit in clause:
+            score = breaks[lit >> 1]
+            if best_break is None or score < best_break:
+                best = [lit >> 1]
+                best_break = score
+            elif score == best_break:
+                best.append(lit >> 1)
+        if best_break > 0 and self.rng.random() < noise:
+            return self.rng.choice(clause) >> 1
+        return self.rng.choice(best)
+
+    def probsat_pick(self, clause, cb, eps):
+        """Picks the variable to flip in an unsatisfied clause, ProbSAT style."""
+        breaks = self.breaks
+        weights = [(eps + breaks[lit >> 1]) ** -cb for lit in clause]
+        return self.rng.choices(clause, weights)[0] >> 1
+
+    def solve(self, algorithm='probsat', max_flips=100000, max_tries=10,
+              noise=0.5, cb=2.3, eps=1.0, from_phases=False):
+        """Looks for a model, restarting from a fresh random assignment
+        every max_flips flips, up to max_tries times.
+
+        With from_phases the first try starts from the store's saved phases
+        instead, e.g. ones a complete solver left behind. noise is
+        WalkSAT's random walk probability, cb and eps ProbSAT's break
+        weighting. Returns True if every clause is satisfied, False if it
+        gave up (which doesn't mean they can't be).
+        """
+        if not self.engine.ok or any(len(clause) == 0 for clause in self.clauses):
+            return False
+        if algorithm not in ('walksat', 'probsat'):
+            raise ValueError('unknown local search algorithm {!r}, expected '
+                             'probsat or walksat'.format(algorithm))
+        rng = self.rng
+        phases = self.engine.phases
+        for attempt in range(max_tries):
+            self.tries += 1
+            if attempt == 0 and from_phases:
+                self.reset([phase ^ 1 for phase in phases])
+            else:
+                self.reset([rng.randrange(2) for _ in range(len(self.values))])
+            unsat = self.unsat
+            for _ in range(max_flips):
+                if len(unsat) < self.best_unsat:
+                    self.best_unsat = len(unsat)
+                    self.best = list(self.values)
+                if not unsat:
+                    return True
+                clause = self.clauses[unsat[rng.randrange(len(unsat))]]
+                if algorithm == 'walksat':
+                    var = self.walksat_pick(clause, noise)
+                else:
+                    var = self.probsat_pick(clause, cb, eps)
+                self.flip(var)
+            if not unsat:
+                self.best_unsat = 0
+                self.best = list(self.values)
+                return True
+        return False
+
+    def assignment(self):
+        """Gives the best assignment found as a dictionary of name to value."""
+        engine = self.engine
+        return {engine.name(var): bool(value) for var, value in enumerate(self.best)}
+
+    def phases(self):
+        """Saves the best assignment found as the store's phases, for a
+        complete solver to branch on."""
+        if self.best is None:
+            return
+        phases = self.engine.phases
+        for var, value in enumerate(self.best):
+            phases[var] = value ^ 1
+
+    def statistics(self):
+        """Gives the search counters as a dictionary."""
+        return {
+            'flips': self.flips,
+            'tries': self.tries,
+            'best_unsat': self.best_unsat,
+        }
+
+
+def solve(representation, algorithm='probsat', max_flips=100000, max_tries=10,
+          seed=None):
+    """Looks for a model of a list of clauses of string literals by local
+    search.
+
+    Returns a dictionary from variable names to truth values, or None if
+    none was found (which doesn't mean there isn't one).
+    """
+    search = LocalSearch(WatchedClauses(representation), seed)
+    if search.solve(algorithm, max_flips, max_tries):
+        return search.assignment()
+    return None
@@ -0,0 +1,183 @@
+"""portfolio.py: solve one formula with several differently set up CDCL
+solvers at once, each in its own process.
+
+Every worker loads the formula itself and runs CDCL with its own seed,
+decision heuristic and restart policy. The first worker to answer sets a
+shared stop flag; the others see it at their next check (see
+CDCLSolver.interrupt) and return without an answer, so the pool shuts down
+cleanly instead of being killed.
+
+With share=True the workers also pass their short learned clauses to each
+other through a ClauseExchange in shared memory, and take in each other's
+clauses whenever they restart.
+
+>>> answer = solve([['A', 'B'], ['~A'], ['~B', 'C']], workers=2)
+>>> answer['satisfiable'], answer['model']
+(True, {'A': False, 'B': True, 'C': True})
+
+solve('hard.cnf', workers=8) reads the formula from a DIMACS file instead.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cdcl import CDCLSolver
+from dimacs import read_dimacs
+from watched import WatchedClauses
+
+HEURISTICS = ['vsids', 'vsids', 'vsids', 'jw']
+RESTARTS = ['luby', 'glucose', 'geometric', 'luby', 'none']
+
+
+def default_configs(count):
+    """Gives count different solver configurations, varying the seed on
+    every one and the heuristic and restart policy between them."""
+    return [{
+        'heuristic': HEURISTICS[index % len(HEURISTICS)],
+        'restarts': RESTARTS[index % len(RESTARTS)],
+        'phase_saving': index % 3 != 2,
+        'seed': index,
+    } for index in range(count)]
+
+
+class ClauseExchange:
+    """Short learned clauses shared between processes through shared memory.
+
+    Each worker writes into its own ring buffer, as the clause size followed
+    by its literals, and reads the buffers of all the others. A reader that
+    falls a whole buffer behind skips ahead and misses some clauses, which
+    only costs it the chance to learn them. Every buffer has a lock, so a
+    clause is never read half written.
+    """
+
+    def __init__(self, workers, capacity=1 << 16, max_size=8):
+        """Sets up the buffers; only clauses of up to max_size literals are
+        shared."""
+        self.capacity = capacity
+        self.max_size = max_size
+        self.buffers = [multiprocessing.Array('i', capacity) for _ in range(workers)]
+        self.written = [multiprocessing.Value('q', 0, lock=False)
+                        for _ in range(workers)]
+        self.slot = None
+        self.read = []
+
+    def join(self, slot):
+        """Makes this process the writer of one of the buffers."""
+        self.slot = slot
+        self.read = [written.value for written in self.written]
+
+    def export(self, lits):
+        """Shares a learned clause if it's short enough."""
+        if len(lits) > self.max_size:
+            return
+        buffer = self.buffers[self.slot]
+        written = self.written[self.slot]
+        with buffer.get_lock():
+            position = written.value
+            buffer[position % self.capacity] = len(lits)
+            for lit in lits:
+                position += 1
+                buffer[position % self.capacity] = lit
+            written.value = position + 1
+
+    def imports(self):
+        """Gives the clauses the other workers shared since the last call."""
+        clauses = []
+        for slot, buffer in enumerate(self.buffers):
+            if slot == self.slot:
+                continue
+            with buffer.get_lock():
+                written = self.written[slot].value
+                position = self.read[slot]
+                if written - position > self.capacity:
+                    position = written
+                while position < written:
+                    size = buffer[position % self.capacity]
+                    clauses.append([buffer[(position + offset) % self.capacity]
+                                    for offset in range(1, size + 1)])
+                    position += size + 1
+                self.read[slot] = position
+        return clauses
+
+
+# set in each worker process by start_worker
+stop = None
+exchange = None
+
+
+def start_worker(stop_flag, clause_exchange, slots):
+    """Keeps the shared stop flag and exchange in the worker process."""
+    global stop, exchange
+    stop = stop_flag
+    exchange = clause_exchange
+    if exchange is not None:
+        with slots.get_lock():
+            slot = slots.value
+            slots.value += 1
+        exchange.join(slot)
+
+
+def load(source):
+    """Builds a store from a DIMACS path or a list of clauses of string
+    literals."""
+    if isinstance(source, str):
+        return read_dimacs(source)
+    return WatchedClauses(source)
+
+
+def run(source, config):
+    """Runs one configured solver in a worker process.
+
+    Returns the configuration, the answer (None if it was stopped), the
+    model if there is one, and the solver's statistics.
+    """
+    engine = load(source)
+    solver = CDCLSolver(engine, config['heuristic'], config['restarts'],
+                        config['phase_saving'], config['seed'])
+    solver.interrupt = stop.is_set
+    solver.exchange = exchange
+    satisfiable = solver.solve()
+    if satisfiable is not None:
+        stop.set()
+    model = engine.assignment() if satisfiable else None
+    return config, satisfiable, model, solver.statistics()
+
+
+def solve(source, workers=None, configs=None, share=False):
+    """Solves a formula with a portfolio of solvers in a process pool.
+
+    source is a DIMACS path or a list of clauses of string literals. There
+    is one solver per configuration, default_configs(workers) by default,
+    with workers processes running them (one per core by default).
+
+    Returns a dictionary with whether the formula is satisfiable, the
+    model if it is, and the configuration and statistics of the solver
+    that answered.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if configs is None:
+        configs = default_configs(workers)
+    stop_flag = multiprocessing.Event()
+    clause_exchange = ClauseExchange(workers) if share else None
+    slots = multiprocessing.Value('i', 0)
+    with ProcessPoolExecutor(workers, initializer=start_worker,
+                             initargs=(stop_flag, clause_exchange, slots)) as pool:
+        pending = {pool.submit(run, source, config) for config in configs}
+        answer = None
+        while pending and answer is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                config, satisfiable, model, statistics = future.result()
+                if satisfiable is not None and answer is None:
+                    answer = {
+                        'satisfiable': satisfiable,
+                        'model': model,
+                        'config': config,
+                        'statistics': statistics,
+                    }
+        stop_flag.set()
+        for future in pending:
+            future.cancel()
+    return answer
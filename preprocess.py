@@ -0,0 +1,286 @@
+"""preprocess.py: simplifying a formula before the search starts.
+
+A Preprocessor takes the clauses of a WatchedClauses store and shrinks
+them with
+
+    units         propagating unit clauses to the end, removing satisfied
+                  clauses and false literals
+    subsumption   removing a clause D when another clause C is a subset of
+                  it, since C being true makes D true
+    strengthening removing the literal ~l from D when C holds l and the rest
+                  of C is a subset of D (self-subsuming resolution), since
+                  C and D resolve to D without ~l
+    elimination   replacing every clause with a variable in it by all their
+                  non-tautological resolvents on it, as long as that doesn't
+                  make more clauses (bounded variable elimination)
+
+Each clause knows where it is through occurrence lists, one set of clause
+numbers per literal, so a clause is only compared with the clauses that
+share its rarest variable.
+
+Elimination keeps satisfiability but not models: a model of the simplified
+clauses may make a removed clause false. The removed clauses go onto a
+reconstruction stack with the eliminated literal they held, and extend()
+goes back down the stack making each false clause true by flipping that
+literal, which gives a model of the original clauses.
+"""
+
+import time
+
+from watched import WatchedClauses
+
+
+class Preprocessor:
+    """Simplifies the clauses of a store and turns models of the simplified
+    clauses back into models of the original ones."""
+
+    # elimination skips variables with more clauses than this on either side
+    occurrence_limit = 16
+    # and gives up on a variable if a resolvent would be longer than this
+    resolvent_limit = 16
+
+    def __init__(self, engine):
+        """Reads the clauses of a store, leaving out learned ones. The store
+        must be at decision level 0; anything assigned there counts as a
+        unit clause."""
+        self.engine = engine
+        self.clauses = []
+        self.occurs = [set() for _ in range(2 * engine.num_variables)]
+        self.units = []
+        self.fixed = bytearray(engine.num_variables)
+        self.eliminated = bytearray(engine.num_variables)
+        self.stack = []
+        self.queue = []
+        self.ok = engine.ok
+        self.statistics = {
+            'variables': engine.num_variables,
+            'clauses': len(engine.arena) - sum(engine.arena.learnt),
+            'units': 0,
+            'subsumed': 0,
+            'strengthened': 0,
+            'eliminated': 0,
+            'resolvents': 0,
+        }
+        arena = engine.arena
+        for index in range(len(arena)):
+            if not arena.learnt[index]:
+                self.add(arena.literals(index))
+        for lit in engine.trail:
+            self.assign(lit)
+
+    def add(self, lits):
+        """Adds a clause of integer literals, already free of duplicates and
+        tautologies, and queues it for subsumption."""
+        if not lits:
+            self.ok = False
+            return
+        if len(lits) == 1:
+            self.assign(lits[0])
+            return
+        index = len(self.clauses)
+        self.clauses.append(lits)
+        for lit in lits:
+            self.occurs[lit].add(index)
+        self.queue.append(index)
+
+    def remove(self, index):
+        """Deletes a clause."""
+        for lit in self.clauses[index]:
+            self.occurs[lit].discard(index)
+        self.clauses[index] = None
+
+    def strengthen(self, index, lit):
+        """Removes a literal from a clause, assigning it if it becomes unit."""
+        clause = self.clauses[index]
+        clause.remove(lit)
+        self.occurs[lit].discard(index)
+        if len(clause) == 1:
+            self.remove(index)
+            self.assign(clause[0])
+        else:
+            self.queue.append(index)
+
+    def assign(self, lit):
+        """Makes a literal true for good, along with everything it implies."""
+        pending = [lit]
+        while pending and self.ok:
+            lit = pending.pop()
+            var = lit >> 1
+            if self.fixed[var]:
+                if self.fixed[var] != 2 - (lit & 1):
+                    self.ok = False
+                continue
+            # 2 for true, 1 for false
+            self.fixed[var] = 2 - (lit & 1)
+            self.units.append(lit)
+            self.statistics['units'] += 1
+            for index in list(self.occurs[lit]):
+                self.remove(index)
+            for index in list(self.occurs[lit ^ 1]):
+                clause = self.clauses[index]
+                clause.remove(lit ^ 1)
+                if len(clause) == 1:
+                    self.occurs[clause[0]].discard(index)
+                    self.clauses[index] = None
+                    pending.append(clause[0])
+            self.occurs[lit ^ 1].clear()
+
+    def subsume(self, index):
+        """Removes the clauses a clause subsumes and strengthens the ones it
+        can by self-subsuming resolution."""
+        clause = self.clauses[index]
+        occurs = self.occurs
+        rarest = min(clause, key=lambda lit: len(occurs[lit]) + len(occurs[lit ^ 1]))
+        for other in list(occurs[rarest] | occurs[rarest ^ 1]):
+            target = self.clauses[other]
+            if other == index or target is None or len(target) < len(clause):
+                continue
+            members = set(target)
+            flipped = None
+            for lit in clause:
+                if lit in members:
+                    continue
+                if flipped is None and lit ^ 1 in members:
+                    flipped = lit
+                else:
+                    break
+            else:
+                if flipped is None:
+                    self.remove(other)
+                    self.statistics['subsumed'] += 1
+                else:
+                    self.strengthen(other, flipped ^ 1)
+                    self.statistics['strengthened'] += 1
+                if not self.ok or self.clauses[index] is None:
+                    return
+
+    def resolvents(self, var):
+        """Gives the non-tautological resolvents of the clauses on a variable,
+        or None if there would be more of them than clauses or one would be
+        too long."""
+        positive = [self.clauses[index] for index in self.occurs[2 * var]]
+        negative = [self.clauses[index] for index in self.occurs[2 * var + 1]]
+        limit = len(positive) + len(negative)
+        resolvents = []
+        for first in positive:
+            for second in negative:
+                members = set(first)
+                members.discard(2 * var)
+                for lit in second:
+                    if lit ^ 1 in members and lit != 2 * var + 1:
+                        break
+                    members.add(lit)
+                else:
+                    members.discard(2 * var + 1)
+                    if len(members) > self.resolvent_limit or len(resolvents) == limit:
+                        return None
+                    resolvents.append(list(members))
+        return resolvents
+
+    def eliminate(self, var):
+        """Eliminates a variable if it doesn't add clauses.
+
+        Returns whether it was eliminated.
+        """
+        occurs = self.occurs
+        if self.fixed[var] or self.eliminated[var]:
+            return False
+        if not occurs[2 * var] and not occurs[2 * var + 1]:
+            return False
+        if (len(occurs[2 * var]) > self.occurrence_limit
+                or len(occurs[2 * var + 1]) > self.occurrence_limit):
+            return False
+        resolvents = self.resolvents(var)
+        if resolvents is None:
+            return False
+        for lit in (2 * var, 2 * var + 1):
+            for index in list(occurs[lit]):
+                self.stack.append((lit, self.clauses[index]))
+                self.remove(index)
+        self.eliminated[var] = 1
+        self.statistics['eliminated'] += 1
+        self.statistics['resolvents'] += len(resolvents)
+        for resolvent in resolvents:
+            self.add(resolvent)
+        return True
+
+    def run(self):
+        """Simplifies the clauses until nothing more changes.
+
+        Returns False if they turned out to be unsatisfiable.
+        """
+        started = time.perf_counter()
+        while self.ok:
+            while self.queue and self.ok:
+                index = self.queue.pop()
+                if self.clauses[index] is not None:
+                    self.subsume(index)
+            variables = sorted(
+                range(self.engine.num_variables),
+                key=lambda var: len(self.occurs[2 * var]) + len(self.occurs[2 * var + 1]))
+            changed = False
+            for var in variables:
+                if not self.ok:
+                    break
+                if self.eliminate(var):
+                    changed = True
+            if not changed and not self.queue:
+                break
+        self.statistics['seconds'] = time.perf_counter() - started
+        self.statistics['remaining_variables'] = sum(
+            1 for var in range(self.engine.num_variables)
+            if self.occurs[2 * var] or self.occurs[2 * var + 1])
+        self.statistics['remaining_clauses'] = sum(
+            1 for clause in self.clauses if clause is not None)
+        return self.ok
+
+    def simplified(self):
+        """Gives a new store holding the simplified clauses, with the same
+        variables and names, and the fixed literals as unit clauses."""
+        engine = WatchedClauses()
+        engine.new_variables(self.engine.num_variables)
+        for var, name in self.engine.names.items():
+            engine.name_variable(var, name)
+        if not self.ok:
+            engine.ok = False
+            return engine
+        for lit in self.units:
+            engine.add_literals([lit])
+        for clause in self.clauses:
+            if clause is not None:
+                engine.add_literals(clause)
+        return engine
+
+    def extend(self, assignment):
+        """Turns a model of the simplified clauses, as a dictionary of name
+        to value, into a model of the original ones.
+
+        Variables the model leaves out are taken as false. Returns a new
+        dictionary with a value for every variable.
+        """
+        engine = self.engine
+        values = bytearray(engine.num_variables)
+        for name, value in assignment.items():
+            var = engine.ids[name] if name in engine.ids else int(name) - 1
+            values[var] = value
+        for lit in self.units:
+            values[lit >> 1] = not lit & 1
+        for witness, clause in reversed(self.stack):
+            for lit in clause:
+                if values[lit >> 1] != lit & 1:
+                    break
+            else:
+                values[witness >> 1] = not witness & 1
+        return {engine.name(var): bool(values[var])
+                for var in range(engine.num_variables)}
+
+
+def preprocess(engine):
+    """Simplifies a store's clauses.
+
+    Returns a new store with the simplified clauses and the Preprocessor,
+    whose extend() turns the new store's models into models of the old one.
+    """
+    preprocessor = Preprocessor(engine)
+    preprocessor.run()
+    return preprocessor.simplified(), preprocessor
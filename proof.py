@@ -0,0 +1,137 @@
+"""proof.py: logging DRAT proofs of unsatisfiability.
+
+A DRAT proof lists every clause a solver learned, in the order it learned
+them, and every clause it deleted, ending with the empty clause. Each added
+clause (a lemma) must follow from the clauses before it by unit propagation
+(RUP) or be a resolution asymmetric tautology (RAT), so a checker can replay
+the proof against the original formula and confirm an UNSAT answer without
+trusting the solver (see checker.py).
+
+Lemmas use the DIMACS numbering of the formula, variable v + 1 for id v, as
+write_dimacs does, so check a proof against the formula write_dimacs wrote
+out for the same store.
+
+The binary format writes a lemma as 'a' (or 'd' for a deletion), then each
+literal as 2 * variable + sign in 7 bit groups, low group first, and a 0
+byte; with literals counting from 0 that number is just lit + 2. Proofs go
+through a buffer of buffer_size bytes, written out whole when full, so
+logging costs an append per literal and memory stays bounded however long
+the proof is.
+
+>>> import io
+>>> stream = io.BytesIO()
+>>> with DratWriter(stream, binary=False) as writer:
+...     writer.add([0, 3])
+...     writer.delete([0, 3])
+...     writer.add([])
+>>> stream.getvalue()
+b'1 -2 0\\nd 1 -2 0\\n0\\n'
+"""
+
+from arena import to_dimacs
+
+# how many bytes of a proof to keep before writing them out
+BUFFER_SIZE = 1 << 20
+
+
+class DratWriter:
+    """Writes lemmas and deletions to a DRAT proof through a buffer."""
+
+    def __init__(self, target, binary=True, buffer_size=BUFFER_SIZE):
+        """Initializes the writer.
+
+        target is a path, which is opened and closed by the writer, or a
+        binary file object. binary chooses binary DRAT over text.
+        """
+        if isinstance(target, str):
+            self.stream = open(target, 'wb', buffering=0)
+            self.owned = True
+        else:
+            self.stream = target
+            self.owned = False
+        self.binary = binary
+        self.buffer = bytearray()
+        self.buffer_size = buffer_size
+        self.additions = 0
+        self.deletions = 0
+        self.written = 0
+
+    def __enter__(self):
+        """Gives the writer itself."""
+        return self
+
+    def __exit__(self, *exception):
+        """Closes the writer."""
+        self.close()
+
+    def write(self, tag, lits):
+        """Adds a lemma or deletion of integer literals to the buffer."""
+        buffer = self.buffer
+        if self.binary:
+            buffer.append(tag)
+            for lit in lits:
+                number = lit + 2
+                while number > 127:
+                    buffer.append(number & 127 | 128)
+                    number >>= 7
+                buffer.append(number)
+            buffer.append(0)
+        else:
+            if tag == ord('d'):
+                buffer += b'd '
+            for lit in lits:
+                buffer += b'%d ' % to_dimacs(lit)
+            buffer += b'0\n'
+        if len(buffer) >= self.buffer_size:
+            self.flush()
+
+    def add(self, lits):
+        """Logs a lemma, a clause of integer literals; an empty one ends the
+        proof."""
+        self.additions += 1
+        self.write(ord('a'), lits)
+
+    def delete(self, lits):
+        """Logs the deletion of a clause of integer literals."""
+        self.deletions += 1
+        self.write(ord('d'), lits)
+
+    def add_implied(self, engine, lits=(), levels=None):
+        """Logs the lemma that the store's decisions imply one of some
+        literals, or with none given, that they can't all be true.
+
+        levels is how many decision levels to take the decisions from, all
+        of them by default. This is what DPLL learns without analyzing
+        anything: logging a lemma at every conflict and at every level it
+        backtracks out of makes each one RUP, and a pure literal's lemma is
+        RAT on the literal, since the decisions satisfy every clause with
+        its complement.
+        """
+        trail = engine.trail
+        limits = engine.trail_lim if levels is None else engine.trail_lim[:levels]
+        self.add(list(lits) + [trail[start] ^ 1 for start in limits
+                               if start < len(trail)])
+
+    def flush(self):
+        """Writes out the buffer."""
+        if self.buffer:
+            self.stream.write(self.buffer)
+            self.written += len(self.buffer)
+            self.buffer = bytearray()
+
+    def close(self):
+        """Writes out the buffer, and closes the file if the writer opened
+        it."""
+        self.flush()
+        if self.owned:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+    def statistics(self):
+        """Gives the proof counters as a dictionary."""
+        return {
+            'additions': self.additions,
+            'deletions': self.deletions,
+            'bytes': self.written + len(self.buffer),
+        }
@@ -0,0 +1,141 @@
+"""restarts.py: restart policies for the CDCL search loop.
+
+A restart cancels every decision and starts the search again from level 0,
+keeping the learned clauses, the variable activities and the saved phases,
+so a run of bad early decisions doesn't hold up the whole search. A policy
+hears about each conflict and says when it's time to restart.
+
+    none       never restart
+    luby       restart after unit * luby(i) conflicts: 1 1 2 1 1 2 4 1 1 2 ...
+    geometric  restart after first, first * factor, first * factor ** 2 ...
+    glucose    restart when the LBD of the recent learned clauses is well
+               above the average over the whole run
+"""
+
+from collections import deque
+
+
+def luby(index):
+    """Gives the index'th (from 0) number of the Luby sequence."""
+    size = 1
+    sequence = 0
+    while size < index + 1:
+        sequence += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        sequence -= 1
+        index %= size
+    return 1 << sequence
+
+
+class NoRestarts:
+    """Never restarts."""
+
+    def conflict(self, lbd):
+        """Hears about a conflict and the LBD of the clause learned from it."""
+
+    def should_restart(self):
+        """Determines whether the search should restart now."""
+        return False
+
+    def restarted(self):
+        """Hears that the search restarted."""
+
+
+class Luby(NoRestarts):
+    """Restarts after a number of conflicts following the Luby sequence."""
+
+    def __init__(self, unit=100):
+        """Initializes the policy; unit is the length of the shortest run."""
+        self.unit = unit
+        self.index = 0
+        self.conflicts = 0
+        self.limit = unit * luby(0)
+
+    def conflict(self, lbd):
+        """Counts a conflict."""
+        self.conflicts += 1
+
+    def should_restart(self):
+        """Determines whether this run has had its share of conflicts."""
+        return self.conflicts >= self.limit
+
+    def restarted(self):
+        """Moves on to the next number of the sequence."""
+        self.index += 1
+        self.conflicts = 0
+        self.limit = self.unit * luby(self.index)
+
+
+class Geometric(Luby):
+    """Restarts after a number of conflicts that grows by a fixed factor."""
+
+    def __init__(self, first=100, factor=1.5):
+        """Initializes the policy with the length of the first run and how
+        much longer each run is than the one before."""
+        self.factor = factor
+        self.conflicts = 0
+        self.limit = first
+
+    def restarted(self):
+        """Makes the next run longer."""
+        self.conflicts = 0
+        self.limit *= self.factor
+
+
+class Glucose(NoRestarts):
+    """Restarts when recent learned clauses are much worse than usual.
+
+    The LBD (literal block distance) of a learned clause is the number of
+    decision levels among its literals; a high LBD means the search is
+    learning weak clauses in its current part of the space.
+    """
+
+    def __init__(self, window=50, margin=0.8):
+        """Initializes the policy; window is how many recent conflicts make
+        up the fast average, and the search restarts once margin times the
+        fast average is above the average over the whole run."""
+        self.margin = margin
+        self.recent = deque(maxlen=window)
+        self.recent_total = 0
+        self.total = 0
+        self.conflicts = 0
+
+    def conflict(self, lbd):
+        """Adds a learned clause's LBD to both averages."""
+        if len(self.recent) == self.recent.maxlen:
+            self.recent_total -= self.recent[0]
+        self.recent.append(lbd)
+        self.recent_total += lbd
+        self.total += lbd
+        self.conflicts += 1
+
+    def should_restart(self):
+        """Determines whether the recent LBDs are high enough to restart."""
+        recent = self.recent
+        if len(recent) < recent.maxlen:
+            return False
+        return (self.recent_total / len(recent) * self.margin
+                > self.total / self.conflicts)
+
+    def restarted(self):
+        """Starts a new window of recent conflicts."""
+        self.recent.clear()
+        self.recent_total = 0
+
+
+RESTARTS = {
+    'none': NoRestarts,
+    'luby': Luby,
+    'geometric': Geometric,
+    'glucose': Glucose,
+}
+
+
+def make_restart_policy(name):
+    """Builds the restart policy with the given name."""
+    if name not in RESTARTS:
+        raise ValueError('unknown restart policy {!r}, expected one of {}'.format(
+            name, ', '.join(sorted(RESTARTS))))
+    return RESTARTS[name]()
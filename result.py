@@ -0,0 +1,53 @@
+"""result.py: what a solver found out about a formula.
+
+A Result has a status, SAT, UNSAT or UNKNOWN (the search stopped before it
+knew), the model when there is one, and the search statistics. It is true
+only when the status is SAT, so it can stand in for the plain True and
+False answers:
+
+>>> result = Result(SAT, {'A': True}, {'decisions': 1})
+>>> bool(result), result.satisfiable
+(True, True)
+>>> Result(UNKNOWN).satisfiable is None
+True
+"""
+
+SAT = 'SAT'
+UNSAT = 'UNSAT'
+UNKNOWN = 'UNKNOWN'
+
+
+class Result:
+    """The answer of a solver, with its model and statistics."""
+
+    def __init__(self, status, model=None, statistics=None):
+        """Initializes the result; model is a dictionary of name to value
+        and statistics one of counter name to count."""
+        if status not in (SAT, UNSAT, UNKNOWN):
+            raise ValueError('unknown status {!r}, expected SAT, UNSAT or '
+                             'UNKNOWN'.format(status))
+        self.status = status
+        self.model = model
+        self.statistics = {} if statistics is None else statistics
+
+    @classmethod
+    def from_answer(cls, answer, model=None, statistics=None):
+        """Builds a result from a True, False or None (unknown) answer."""
+        status = UNKNOWN if answer is None else SAT if answer else UNSAT
+        return cls(status, model if answer else None, statistics)
+
+    @property
+    def satisfiable(self):
+        """Gives True, False, or None if it isn't known."""
+        if self.status == UNKNOWN:
+            return None
+        return self.status == SAT
+
+    def __bool__(self):
+        """Determines whether the formula was found satisfiable."""
+        return self.status == SAT
+
+    def __repr__(self):
+        """Gives a short string representation of the result."""
+        return 'Result(status={}, model={!r}, statistics={!r})'.format(
+            self.status, self.model, self.statistics)
@@ -0,0 +1,200 @@
+"""service.py: solving a queue of independent DIMACS instances in parallel.
+
+solve_batch() spreads instances over a pool of worker processes and yields
+one result record per instance as each one finishes, in whatever order
+they finish. It never has more than a couple of instances per worker in
+flight and reads the instance list lazily, so memory stays flat however
+many instances there are.
+
+Each instance gets a time limit, after which its search gives up with
+status UNKNOWN, and each worker a memory limit (the address space it may
+use), past which the instance fails with a MemoryError and is reported
+as UNKNOWN with the error 'memory limit'. With a memory limit each worker
+solves one instance and is replaced by a fresh one, forked from a process
+that has the solver loaded already, so an instance that used up most of
+the limit doesn't leave the next one without memory.
+
+From the command line, the records are written as JSON Lines:
+
+    python service.py instances/ --workers 4 --seconds 30 --memory 2048
+    find . -name '*.cnf.gz' | python service.py - > results.jsonl
+"""
+
+import argparse
+import errno
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import dpll
+from budget import Budget
+from cdcl import CDCLSolver
+from dimacs import read_dimacs
+from heuristics import make_heuristic
+from result import Result, UNKNOWN
+from stats import Statistics
+
+METHODS = ('cdcl', 'dpll')
+
+
+def instances(source):
+    """Yields the instance paths of a source: every .cnf or .cnf.gz file
+    under a directory, a single file, or '-' for paths read from standard
+    input, one per line."""
+    if source == '-':
+        for line in sys.stdin:
+            if line.strip():
+                yield line.strip()
+    elif os.path.isdir(source):
+        for directory, subdirectories, files in os.walk(source):
+            subdirectories.sort()
+            for name in sorted(files):
+                if name.endswith(('.cnf', '.cnf.gz')):
+                    yield os.path.join(directory, name)
+    else:
+        yield source
+
+
+def start_worker(memory):
+    """Limits the worker's address space to memory megabytes, if given."""
+    if memory is not None:
+        limit = memory * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def worker_options(memory):
+    """Gives the process pool options for a memory limit.
+
+    A worker keeps the memory its instances took, up to its limit, so with
+    a limit each instance gets a worker of its own. They are forked from a
+    server process that has already imported the solver, where there is
+    one, so a new worker costs a fork rather than starting Python again.
+    """
+    if memory is None:
+        return {}
+    options = {'max_tasks_per_child': 1}
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['service'])
+        options['mp_context'] = context
+    return options
+
+
+def solve_instance(path, method, seconds, models):
+    """Reads and solves one instance in a worker process.
+
+    Returns its result record.
+    """
+    started = time.perf_counter()
+    record = {'instance': path}
+    try:
+        engine = read_dimacs(path)
+        stats = Statistics()
+        # the time limit counts reading the instance too
+        budget = Budget(None if seconds is None else started + seconds - time.perf_counter())
+        budget.start(stats)
+        if method == 'cdcl':
+            solver = CDCLSolver(engine, stats=stats)
+            solver.interrupt = budget
+            answer = solver.solve()
+        else:
+            order = make_heuristic('first', engine)
+            stats.start()
+            try:
+                answer = dpll.search(engine, order, stats, budget)
+            finally:
+                stats.stop()
+        result = Result.from_answer(answer, None, stats.as_dict())
+        if answer is None:
+            result.statistics['stopped'] = budget.exhausted
+        record['status'] = result.status
+        if answer and models:
+            # the model as DIMACS literals, like a SAT competition 'v' line
+            record['model'] = [(lit >> 1) + 1 if not lit & 1 else -(lit >> 1) - 1
+                               for lit in sorted(engine.trail)]
+        record['statistics'] = result.statistics
+    except MemoryError:
+        record['status'] = UNKNOWN
+        record['error'] = 'memory limit'
+    except (OSError, ValueError) as error:
+        record['status'] = UNKNOWN
+        if isinstance(error, OSError) and error.errno == errno.ENOMEM:
+            record['error'] = 'memory limit'
+        else:
+            record['error'] = str(error)
+    record['seconds'] = time.perf_counter() - started
+    return record
+
+
+def solve_batch(paths, workers=None, method='cdcl', seconds=None, memory=None,
+                models=False, in_flight=2):
+    """Solves instances in a process pool, yielding each one's record as
+    soon as it finishes.
+
+    paths is any iterable of DIMACS paths, read only as fast as workers
+    free up. seconds is the time limit per instance and memory the memory
+    limit per instance in megabytes, which gets each instance a fresh
+    worker. With models, satisfiable instances'
+    records include their model. At most in_flight instances per worker
+    are queued at once.
+    """
+    if method not in METHODS:
+        raise ValueError('unknown method {!r}, expected one of {}'.format(
+            method, ', '.join(METHODS)))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    paths = iter(paths)
+    with ProcessPoolExecutor(workers, initializer=start_worker, initargs=(memory,),
+                             **worker_options(memory)) as pool:
+        pending = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < workers * in_flight:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(solve_instance, path, method,
+                                            seconds, models))
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main(arguments=None):
+    """Solves a batch of instances from the command line, writing JSON
+    Lines."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help='a directory, a .cnf file, or - for '
+                        'paths on standard input')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--method', choices=METHODS, default='cdcl')
+    parser.add_argument('--seconds', type=float, default=None,
+                        help='time limit per instance')
+    parser.add_argument('--memory', type=int, default=None,
+                        help='memory limit per instance, in megabytes')
+    parser.add_argument('--models', action='store_true',
+                        help='include the models of satisfiable instances')
+    parser.add_argument('--output', default='-',
+                        help='where to write the results, - for standard output')
+    options = parser.parse_args(arguments)
+    output = sys.stdout if options.output == '-' else open(options.output, 'w')
+    try:
+        for record in solve_batch(instances(options.source), options.workers,
+                                  options.method, options.seconds,
+                                  options.memory, options.models):
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""stats.py: search counters and optional instrumentation for the solvers.
+
+A Statistics object counts decisions, propagations (literals assigned by
+unit propagation), conflicts, restarts and learned clauses, which is always
+on and costs an integer add per event. Everything else is off until asked
+for and costs a single check per event while it's off:
+
+    timing      the time spent in each phase of the search, in times
+    progress    a callback called with the statistics every so many
+                conflicts
+    profile     a cProfile.Profile running only while the solver does
+    trace       a callback called with each search event and its details,
+                e.g. print_trace to print them as they happen
+
+>>> from benchmark import random_ksat
+>>> from cdcl import CDCLSolver
+>>> from watched import WatchedClauses
+>>> engine = WatchedClauses(random_ksat(100, seed=2))
+>>> stats = Statistics()
+>>> stats.on_progress(lambda stats: print(stats.conflicts), every=200)
+>>> CDCLSolver(engine, stats=stats).solve()
+200
+400
+True
+"""
+
+import cProfile
+import pstats
+import time
+
+
+class Statistics:
+    """Counters for one search, and the hooks that watch it."""
+
+    counters = ('decisions', 'propagations', 'conflicts', 'restarts', 'learned')
+
+    def __init__(self, timing=False, profile=False, trace=None):
+        """Initializes the counters at zero. timing turns on the time per
+        phase, profile a cProfile.Profile, and trace is a function to call
+        with every search event."""
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+        self.restarts = 0
+        self.learned = 0
+        self.timing = timing
+        self.times = {}
+        self.profiler = cProfile.Profile() if profile else None
+        self.trace = trace
+        self.progress = None
+        self.every = 0
+        self.next_report = 0
+        self.started = None
+
+    def on_progress(self, callback, every=1000):
+        """Calls callback with these statistics every time another every
+        conflicts have gone by."""
+        self.progress = callback
+        self.every = every
+        self.next_report = self.conflicts + every
+
+    def report(self):
+        """Calls the progress callback and schedules the next report; the
+        search calls this once conflicts reaches next_report."""
+        self.next_report = self.conflicts + self.every
+        self.progress(self)
+
+    def add_time(self, phase, seconds):
+        """Adds time spent in a phase of the search."""
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+    def start(self):
+        """Starts the profiler, if there is one; the search calls this when
+        it starts."""
+        self.started = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        """Stops the profiler and adds up the total time; the search calls
+        this when it stops."""
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.add_time('total', time.perf_counter() - self.started)
+
+    def print_profile(self, sort='cumulative', limit=30):
+        """Prints the profile of the solver's functions, most expensive
+        first."""
+        pstats.Stats(self.profiler).sort_stats(sort).print_stats(limit)
+
+    def as_dict(self):
+        """Gives the counters, and the times if any were kept, as a
+        dictionary."""
+        statistics = {name: getattr(self, name) for name in self.counters}
+        if self.times:
+            statistics['times'] = dict(self.times)
+        return statistics
+
+
+def print_trace(event, *details):
+    """Prints a search event, for Statistics(trace=print_trace)."""
+    print(event + ':', *details)
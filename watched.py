@@ -0,0 +1,561 @@
+"""watched.py: two-watched-literal unit propagation for CNF sentences.
+
+Clauses are kept in a ClauseArena as integer literals (see arena.py). String
+literals such as 'A' or '~B', the form Sentence.representation uses, are
+turned into literals through a table of variable names, but a variable
+doesn't need a name: numbered variables cost no more than their slots in the
+per-literal arrays.
+
+Every clause of two or more literals watches the literals in its first two
+positions. A clause is only visited when one of its watched literals becomes
+false, so propagating an assignment costs time in the number of clauses
+watching that literal instead of in the size of the whole sentence.
+
+Each assignment also records its decision level and the index of the clause
+that implied it, which is the implication graph conflict analysis walks.
+The trail of assignments is the only record of the search state: branching
+assigns in place and backtracking pops the trail back to a decision level,
+so nothing about the clauses is ever copied.
+
+Pure literals are found from OccurrenceCounts, which follow the trail as
+it grows and shrinks instead of scanning the clauses each time. They come
+out the same as a scan of the unsatisfied clauses would give, after
+backtracking too:
+
+>>> engine = WatchedClauses([['A', 'B']])
+>>> engine.new_decision_level()
+>>> engine.assign(engine.encode('A'))
+True
+>>> engine.pure_literals()
+[]
+>>> engine.cancel_until(0)
+>>> sorted(engine.decode(lit) for lit in engine.pure_literals())
+['A', 'B']
+"""
+
+from array import array
+
+from arena import ClauseArena
+
+# values of a literal in WatchedClauses.values
+FALSE = 0
+TRUE = 1
+UNASSIGNED = 2
+
+# estimated bytes of the watch lists, for WatchedClauses.nbytes: each
+# literal has a slot and a Python list, each clause two entries in them,
+# with the slack lists grow by, and an int object for its index
+WATCH_LIST_BYTES = 64
+WATCH_ENTRY_BYTES = 16
+CLAUSE_INDEX_BYTES = 28
+
+
+class WatchedClauses:
+    """A clause store that propagates assignments with two watched literals."""
+
+    def __init__(self, representation=()):
+        """Builds the store from a list of clauses of string literals."""
+        self.arena = ClauseArena()
+        self.ids = {}
+        self.names = {}
+        self.values = bytearray()
+        self.levels = array('i')
+        self.reasons = array('i')
+        self.phases = bytearray()
+        self.watches = []
+        self.trail = array('i')
+        self.trail_lim = []
+        self.queue_head = 0
+        self.ok = True
+        # the decision heuristic, if it needs to hear about unassigned variables
+        self.order = None
+        # how many times remove_clauses has renumbered the clauses
+        self.compactions = 0
+        # the OccurrenceCounts for pure_literals, made on its first call
+        self.occurrences = None
+        for clause in representation:
+            self.add_clause(clause)
+
+    @property
+    def num_variables(self):
+        """Gives the number of variables."""
+        return len(self.levels)
+
+    def new_variables(self, count):
+        """Adds unnamed variables and gives the id of the first one."""
+        first = len(self.levels)
+        self.values.extend(bytes([UNASSIGNED]) * (2 * count))
+        self.levels.extend(array('i', [-1]) * count)
+        self.reasons.extend(array('i', [-1]) * count)
+        self.phases.extend(bytes([1]) * count)
+        self.watches.extend([None] * (2 * count))
+        return first
+
+    def variable(self, name):
+        """Gives the id of a variable name, creating it if it's new."""
+        var = self.ids.get(name)
+        if var is None:
+            var = self.new_variables(1)
+            self.name_variable(var, name)
+        return var
+
+    def name_variable(self, var, name):
+        """Gives an existing variable a name."""
+        self.ids[name] = var
+        self.names[var] = name
+
+    def name(self, var):
+        """Gives the name of a variable, or its DIMACS number if it has none."""
+        name = self.names.get(var)
+        if name is None:
+            return str(var + 1)
+        return name
+
+    def encode(self, letter):
+        """Turns a string literal like '~A' into an integer literal."""
+        if letter[0] == '~':
+            return 2 * self.variable(letter[1:]) + 1
+        return 2 * self.variable(letter)
+
+    def decode(self, lit):
+        """Turns an integer literal back into a string literal."""
+        name = self.name(lit >> 1)
+        return '~' + name if lit & 1 else name
+
+    def value(self, lit):
+        """Gives the truth value of a literal, or None if it's unassigned."""
+        value = self.values[lit]
+        if value == UNASSIGNED:
+            return None
+        return value == TRUE
+
+    def add_clause(self, clause):
+        """Adds a clause of string literals to the store."""
+        return self.add_literals([self.encode(letter) for letter in clause])
+
+    def add_literals(self, lits, learnt=False):
+        """Adds a clause of integer literals to the store.
+
+        Returns the index of the clause, or None if it was left out.
+        """
+        start = len(self.arena.lits)
+        self.arena.lits.extend(lits)
+        return self.close_clause(start, learnt)
+
+    def close_clause(self, start, learnt=False):
+        """Adds the literals written onto the end of the arena from start as
+        a clause.
+
+        Duplicate literals are dropped and tautologies are left out, since
+        every assignment satisfies them. A unit clause is assigned straight
+        away and an empty clause makes the store unsatisfiable. Returns the
+        index of the clause, or None if it was left out.
+
+        Clauses can be added while the store has assignments, as long as it
+        is at decision level 0: literals that are already false count as
+        missing, so a clause can become unit or empty that way too.
+        """
+        lits = self.arena.lits
+        end = start
+        for position in range(start, len(lits)):
+            lit = lits[position]
+            for other in range(start, end):
+                if lits[other] == lit:
+                    break
+                if lits[other] == lit ^ 1:
+                    del lits[start:]
+                    return None
+            else:
+                lits[end] = lit
+                end += 1
+        del lits[end:]
+        index = self.arena.close(start, learnt)
+        size = end - start
+        if self.occurrences is not None and not learnt:
+            self.occurrences.add_clause(index)
+        if size > 1 and len(self.trail) > 0:
+            # move the literals that aren't false to the front to watch them
+            values = self.values
+            free = start
+            for position in range(start, end):
+                lit = lits[position]
+                if values[lit] != FALSE:
+                    lits[position] = lits[free]
+                    lits[free] = lit
+                    free += 1
+            size = free - start
+        if size == 0:
+            self.ok = False
+        elif size == 1:
+            if not self.assign(lits[start]):
+                self.ok = False
+        else:
+            self.watch(lits[start], index)
+            self.watch(lits[start + 1], index)
+        return index
+
+    def watch(self, lit, index):
+        """Makes a clause watch a literal."""
+        watchers = self.watches[lit]
+        if watchers is None:
+            self.watches[lit] = [index]
+        else:
+            watchers.append(index)
+
+    def add_learned(self, lits):
+        """Adds a clause learned from a conflict and asserts its first literal.
+
+        The first literal must be the only one left unassigned, and the
+        second one the literal assigned at the highest remaining level.
+        Returns the index of the clause, or None for a unit, which is only
+        assigned.
+        """
+        if len(lits) == 1:
+            self.assign(lits[0])
+            return None
+        index = self.arena.add(lits, learnt=True)
+        self.watch(lits[0], index)
+        self.watch(lits[1], index)
+        self.assign(lits[0], index)
+        return index
+
+    def remove_clauses(self, doomed):
+        """Removes a set of clauses by index, compacting the arena, and
+        gives each old index's new one, or -1 if it was removed.
+
+        None of them may be the reason for an assignment. Every clause
+        watches its first two literals, so the watch lists are rebuilt
+        from those and propagation carries on where it was; the reasons on
+        the trail are renumbered. Anything else holding clause indices has
+        to renumber them too, which compactions counts up to tell it.
+        """
+        arena = self.arena
+        keep = bytearray(b'\x01') * len(arena)
+        for index in doomed:
+            keep[index] = 0
+        remap = arena.compact(keep)
+        reasons = self.reasons
+        for lit in self.trail:
+            reason = reasons[lit >> 1]
+            if reason >= 0:
+                reasons[lit >> 1] = remap[reason]
+        self.watches = [None] * (2 * self.num_variables)
+        lits = arena.lits
+        for index in range(len(arena)):
+            if arena.sizes[index] > 1:
+                start = arena.starts[index]
+                self.watch(lits[start], index)
+                self.watch(lits[start + 1], index)
+        self.compactions += 1
+        # the counts go by clause index, so they're made again when needed
+        self.occurrences = None
+        return remap
+
+    def assign(self, lit, reason=-1):
+        """Makes a literal true and queues it for propagation.
+
+        Returns False if the literal is already false.
+        """
+        value = self.values[lit]
+        if value != UNASSIGNED:
+            return value == TRUE
+        self.values[lit] = TRUE
+        self.values[lit ^ 1] = FALSE
+        var = lit >> 1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+        return True
+
+    def decision_level(self):
+        """Gives the number of decisions on the trail."""
+        return len(self.trail_lim)
+
+    def new_decision_level(self):
+        """Starts a new decision level; the next assignment is its decision."""
+        self.trail_lim.append(len(self.trail))
+
+    def cancel_until(self, level):
+        """Unassigns everything above the given decision level, saving the
+        polarity each variable had in phases (1 for negative).
+
+        This costs time in the number of assignments undone.
+        """
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        trail = self.trail
+        values = self.values
+        phases = self.phases
+        for position in range(start, len(trail)):
+            lit = trail[position]
+            values[lit] = UNASSIGNED
+            values[lit ^ 1] = UNASSIGNED
+            phases[lit >> 1] = lit & 1
+        if self.order is not None:
+            for position in range(start, len(trail)):
+                self.order.unassigned(trail[position] >> 1)
+        if self.occurrences is not None:
+            self.occurrences.cancel(start)
+        del trail[start:]
+        del self.trail_lim[level:]
+        self.queue_head = min(self.queue_head, start)
+
+    def propagate(self):
+        """Propagates every queued assignment.
+
+        Returns the index of a clause made false, or None if there's no
+        conflict.
+        """
+        if not self.ok:
+            return -1
+        lits = self.arena.lits
+        starts = self.arena.starts
+        sizes = self.arena.sizes
+        watches = self.watches
+        values = self.values
+        trail = self.trail
+        while self.queue_head < len(trail):
+            false_lit = trail[self.queue_head] ^ 1
+            self.queue_head += 1
+            watchers = watches[false_lit]
+            if not watchers:
+                continue
+            kept = 0
+            i = 0
+            while i < len(watchers):
+                index = watchers[i]
+                i += 1
+                start = starts[index]
+                # keep the false literal in the second watched position
+                first = lits[start]
+                if first == false_lit:
+                    first = lits[start + 1]
+                    lits[start] = first
+                    lits[start + 1] = false_lit
+                first_value = values[first]
+                if first_value == TRUE:
+                    watchers[kept] = index
+                    kept += 1
+                    continue
+                # look for a literal that isn't false to watch instead
+                for position in range(start + 2, start + sizes[index]):
+                    lit = lits[position]
+                    if values[lit] != FALSE:
+                        lits[start + 1] = lit
+                        lits[position] = false_lit
+                        self.watch(lit, index)
+                        break
+                else:
+                    watchers[kept] = index
+                    kept += 1
+                    if first_value == UNASSIGNED:
+                        self.assign(first, index)
+                    else:
+                        # every literal is false, so keep the rest watching
+                        while i < len(watchers):
+                            watchers[kept] = watchers[i]
+                            kept += 1
+                            i += 1
+                        del watchers[kept:]
+                        return index
+            del watchers[kept:]
+        return None
+
+    def is_satisfied(self, index):
+        """Determines whether any literal in a clause is true."""
+        lits = self.arena.lits
+        values = self.values
+        start = self.arena.starts[index]
+        for position in range(start, start + self.arena.sizes[index]):
+            if values[lits[position]] == TRUE:
+                return True
+        return False
+
+    def unsatisfied_clause(self):
+        """Gives the index of the first clause the current assignment doesn't
+        satisfy, or None if they all are. Learned clauses are left out, since
+        the others imply them."""
+        learnt = self.arena.learnt
+        for index in range(len(self.arena)):
+            if not learnt[index] and not self.is_satisfied(index):
+                return index
+        return None
+
+    def all_satisfied(self):
+        """Determines whether the current assignment satisfies every clause.
+
+        Once pure_literals has made occurrence counts, this only catches up
+        with the trail instead of looking at every clause.
+        """
+        if not self.ok:
+            return False
+        if self.occurrences is not None:
+            self.occurrences.sync()
+            return self.occurrences.unsatisfied == 0
+        return self.unsatisfied_clause() is None
+
+    def pure_literals(self):
+        """Finds unassigned literals that only appear in one polarity among
+        the clauses that aren't satisfied yet, leaving out learned ones.
+
+        This costs time in the assignments made and undone since the last
+        call, not in the size of the sentence.
+        """
+        if self.occurrences is None:
+            self.occurrences = OccurrenceCounts(self)
+        return self.occurrences.pure_literals()
+
+    def nbytes(self):
+        """Estimates the bytes the clauses take: the arena's arrays, and the
+        watch lists, which take more than the arena does."""
+        return (self.arena.nbytes() + WATCH_LIST_BYTES * len(self.watches)
+                + (2 * WATCH_ENTRY_BYTES + CLAUSE_INDEX_BYTES) * len(self.arena))
+
+    def assignment(self):
+        """Gives the assigned variables as a dictionary of name to value."""
+        return {self.name(lit >> 1): not lit & 1 for lit in self.trail}
+
+    def representation(self):
+        """Gives the clauses, leaving out learned ones, as a list of lists of
+        string literals."""
+        learnt = self.arena.learnt
+        return [[self.decode(lit) for lit in self.arena.literals(index)]
+                for index in range(len(self.arena)) if not learnt[index]]
+
+
+class OccurrenceCounts:
+    """How many clauses the assignment doesn't satisfy yet each literal is
+    in, kept up to date with a store's trail.
+
+    Each clause counts its true literals. When the trail grows, the clauses
+    of each new literal count it, and a clause that just got its first true
+    literal takes its literals' occurrences off; when the trail shrinks,
+    the same happens in reverse. A literal can only turn pure when the last
+    occurrence of its complement goes, its first occurrence comes back, or
+    its variable is unassigned, so those are the only ones checked.
+    """
+
+    def __init__(self, engine):
+        """Counts the occurrences of the store's clauses, leaving out learned
+        ones."""
+        self.engine = engine
+        self.counts = array('i')
+        self.occurs = []
+        self.true_counts = array('i')
+        # literals that may have turned pure since the last look
+        self.candidates = set()
+        # how much of the trail the counts are up to date with
+        self.synced = 0
+        # how many clauses have no true literal
+        self.unsatisfied = 0
+        self.grow()
+        arena = engine.arena
+        self.true_counts.extend(array('i', [0]) * len(arena))
+        for index in range(len(arena)):
+            if arena.learnt[index]:
+                continue
+            self.unsatisfied += 1
+            for lit in arena.literals(index):
+                self.occurs[lit].append(index)
+                self.counts[lit] += 1
+        self.candidates.update(range(len(self.counts)))
+        self.sync()
+
+    def grow(self):
+        """Makes room for every variable of the store."""
+        missing = 2 * self.engine.num_variables - len(self.counts)
+        if missing > 0:
+            self.counts.extend(array('i', [0]) * missing)
+            self.occurs.extend([] for _ in range(missing))
+
+    def add_clause(self, index):
+        """Counts a clause just added to the store."""
+        self.sync()
+        self.grow()
+        arena = self.engine.arena
+        values = self.engine.values
+        missing = index + 1 - len(self.true_counts)
+        if missing > 0:
+            self.true_counts.extend(array('i', [0]) * missing)
+        lits = arena.literals(index)
+        true_count = 0
+        for lit in lits:
+            self.occurs[lit].append(index)
+            if values[lit] == TRUE:
+                true_count += 1
+        self.true_counts[index] = true_count
+        if true_count == 0:
+            self.unsatisfied += 1
+            for lit in lits:
+                self.counts[lit] += 1
+            # a new occurrence only spoils pure literals, which are checked
+            # anyway, but its own literals may be pure now
+            self.candidates.update(lits)
+
+    def sync(self):
+        """Counts the assignments added to the trail since the last call."""
+        trail = self.engine.trail
+        if self.synced == len(trail):
+            return
+        self.grow()
+        arena = self.engine.arena
+        lits = arena.lits
+        starts = arena.starts
+        sizes = arena.sizes
+        counts = self.counts
+        true_counts = self.true_counts
+        candidates = self.candidates
+        for position in range(self.synced, len(trail)):
+            for index in self.occurs[trail[position]]:
+                true_counts[index] += 1
+                if true_counts[index] == 1:
+                    self.unsatisfied -= 1
+                    start = starts[index]
+                    for other in range(start, start + sizes[index]):
+                        lit = lits[other]
+                        counts[lit] -= 1
+                        if counts[lit] == 0:
+                            candidates.add(lit ^ 1)
+        self.synced = len(trail)
+
+    def cancel(self, start):
+        """Uncounts the assignments from a position on the trail, which the
+        store is about to undo."""
+        if self.synced <= start:
+            return
+        arena = self.engine.arena
+        lits = arena.lits
+        starts = arena.starts
+        sizes = arena.sizes
+        counts = self.counts
+        true_counts = self.true_counts
+        candidates = self.candidates
+        trail = self.engine.trail
+        for position in range(self.synced - 1, start - 1, -1):
+            lit = trail[position]
+            for index in self.occurs[lit]:
+                true_counts[index] -= 1
+                if true_counts[index] == 0:
+                    self.unsatisfied += 1
+                    clause_start = starts[index]
+                    for other in range(clause_start, clause_start + sizes[index]):
+                        other_lit = lits[other]
+                        counts[other_lit] += 1
+                        if counts[other_lit] == 1:
+                            candidates.add(other_lit)
+            candidates.add(lit)
+            candidates.add(lit ^ 1)
+        self.synced = start
+
+    def pure_literals(self):
+        """Gives the unassigned literals that are in clauses not satisfied
+        yet, while their complements aren't."""
+        self.sync()
+        counts = self.counts
+        values = self.engine.values
+        pure = [lit for lit in self.candidates
+                if values[lit] == UNASSIGNED and counts[lit] > 0 and counts[lit ^ 1] == 0]
+        # the rest can't turn pure without becoming candidates again
+        self.candidates = set(pure)
+        return pure